@@ -1,27 +1,55 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import asyncio
+import logging
+import functools
+
+logger = logging.getLogger("hypercog.agents")
+
+@functools.lru_cache(maxsize=32)
+def _read_prompt_file(path: str, mtime_ns: int) -> str:
+    """Read and decode a prompt file once per modification time, shared by all agent instances"""
+    return Path(path).read_text(encoding="utf-8")
 
 class BaseAgent(ABC):
     """Base class for all HyperCog agents"""
     
+    __slots__ = ("name", "prompt_file", "system_prompt", "_system_message")
+    
     def __init__(self, name: str, prompt_file: Optional[Path] = None):
         self.name = name
         self.prompt_file = prompt_file
         self.system_prompt = self._load_system_prompt() if prompt_file else None
+        # Built once so every call sends a byte-identical prefix that providers can cache
+        self._system_message = {"role": "system", "content": self.system_prompt}
     
     def _load_system_prompt(self) -> str:
         """Load system prompt from markdown file"""
-        if self.prompt_file and self.prompt_file.exists():
-            return self.prompt_file.read_text()
-        return ""
+        if not self.prompt_file:
+            return ""
+        try:
+            mtime_ns = self.prompt_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return ""
+        return _read_prompt_file(str(self.prompt_file), mtime_ns)
+    
+    def _build_messages(self, user_content: str) -> List[Dict[str, str]]:
+        """Build chat messages with the static system prompt first and dynamic content last"""
+        return [self._system_message, {"role": "user", "content": user_content}]
     
     @abstractmethod
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """Execute agent logic"""
         pass
     
-    def log(self, message: str, level: str = "INFO"):
-        """Simple logging"""
-        print(f"[{level}] {self.name}: {message}")
+    def log(self, message: str, *args: Any, level: str = "INFO"):
+        """
+        Level-gated logging with deferred %-style formatting
+        
+        message is a %-format string and args its values, so nothing is
+        interpolated unless the level is enabled and a handler accepts it.
+        """
+        levelno = logging.getLevelName(level)
+        if logger.isEnabledFor(levelno):
+            logger.log(levelno, "%s: " + message, self.name, *args)
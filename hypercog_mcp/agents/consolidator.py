@@ -1,17 +1,37 @@
-import json
+import time
 import asyncio
+import hashlib
 from pathlib import Path
-from typing import Dict, Any, List
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple
 from .base_agent import BaseAgent
+from ..utils import json_io
+from ..utils.token_counter import TokenCounter
+
+# How long a persisted result counts as already saved to rough/
+SEEN_RESULT_TTL_SECONDS = 3600.0
+
+# Streaming stops once the reply passes this multiple of the caller's token budget
+BUDGET_OVERSHOOT = 1.1
+
+# Longest single sub-agent answer copied into the consolidation prompt; the full text stays in rough/
+MAX_RESULT_TOKENS = 2000
 
 class ConsolidatorAgent(BaseAgent):
     """Consolidates results from multiple sub-agents"""
     
+    __slots__ = ("llm_client", "rough_folder", "token_counter", "_seen", "_last_snapshot")
+    
     def __init__(self, prompt_file: Path, llm_client, storage_root: Path):
         super().__init__("ConsolidatorAgent", prompt_file)
         self.llm_client = llm_client
         self.rough_folder = storage_root / "rough"
         self.rough_folder.mkdir(parents=True, exist_ok=True)
+        self.token_counter = TokenCounter()
+        # sha256 of source and result content -> monotonic time the result was last written to rough/
+        self._seen: Dict[str, float] = {}
+        # source -> sha256 of the last snapshot written, to skip rewriting identical content
+        self._last_snapshot: Dict[str, str] = {}
     
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,7 +46,8 @@ class ConsolidatorAgent(BaseAgent):
                     "file_search": List[Dict],
                     "cognee_kg": List[Dict],
                     "cognee_vector": List[Dict]
-                }
+                },
+                "token_budget": Optional[int]
             }
         
         Returns:
@@ -37,61 +58,199 @@ class ConsolidatorAgent(BaseAgent):
                 "estimated_tokens": int,
                 "quality_score": float
             }
+            
+            If the reply outgrows token_budget, generation is abandoned and
+            the result carries "over_budget": True with whatever enriched
+            context had been produced so far.
         """
         self.log("Consolidating sub-agent results...")
         
-        await self._save_to_rough_folder(context.get("sub_agent_results", {}))
-        
-        consolidation_prompt = self._build_consolidation_prompt(context)
+        sub_results = self._dedupe_results(context.get("sub_agent_results", {}))
         
-        response = await self.llm_client.chat_completion(
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": consolidation_prompt}
-            ],
-            response_format={"type": "json_object"}
+        # Persist raw results in the background so disk I/O overlaps the LLM call
+        save_task = asyncio.create_task(
+            self._save_to_rough_folder(*self._unsaved_results(sub_results))
         )
         
+        if not any(result.get("success") for results in sub_results.values() for result in results):
+            self.log("No successful sub-agent results; short-circuiting consolidation")
+            await save_task
+            return self._fallback_result(context)
+        
+        consolidation_prompt = self._build_consolidation_prompt(context, sub_results)
+        
         try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
-            self.log("Failed to parse consolidation response", "ERROR")
-            result = {
-                "enriched_context": context.get("original_context", ""),
-                "sources_used": {},
-                "improvements": [],
-                "estimated_tokens": 0,
-                "quality_score": 0.0
-            }
+            response, streamed_tokens = await self._stream_reply(consolidation_prompt, context.get("token_budget"))
+        finally:
+            await save_task
         
-        self.log(f"Consolidation complete, quality_score={result.get('quality_score')}")
+        if streamed_tokens is not None:
+            self.log("Consolidation exceeded token budget after %d tokens; stopping early", streamed_tokens, level="WARNING")
+            return self._over_budget_result(context, response, streamed_tokens)
+        
+        try:
+            result = json_io.loads_lenient(response)
+        except json_io.JSONDecodeError:
+            self.log("Failed to parse consolidation response", level="ERROR")
+            result = self._fallback_result(context)
+        
+        self.log("Consolidation complete, quality_score=%s", result.get('quality_score'))
         
         return result
     
-    async def _save_to_rough_folder(self, results: Dict[str, List[Dict]]):
-        """Save raw sub-agent results to rough/ folder"""
-        from datetime import datetime
+    async def _stream_reply(self, consolidation_prompt: str, token_budget: Optional[int]) -> Tuple[str, Optional[int]]:
+        """
+        Stream the consolidation reply, collecting deltas as they arrive
+        
+        Returns the text and None, or, when a token_budget is given and the
+        running count passes it by BUDGET_OVERSHOOT, the partial text and
+        its token count. Leaving the loop closes the stream, so the
+        provider stops generating the unwanted tail.
+        """
+        limit = token_budget * BUDGET_OVERSHOOT if token_budget else None
+        chunks = []
+        tokens = 0
+        stream = self.llm_client.stream_chat_completion(
+            messages=self._build_messages(consolidation_prompt),
+            response_format={"type": "json_object"},
+            prompt_cache_key=self.name
+        )
+        try:
+            async for chunk in stream:
+                chunks.append(chunk)
+                if limit is not None:
+                    # Deltas are a few characters each; an estimate is plenty for a 10% overshoot check
+                    tokens += self.token_counter.approx_count_tokens(chunk)
+                    if tokens > limit:
+                        return "".join(chunks), tokens
+        finally:
+            await stream.aclose()
+        return "".join(chunks), None
+    
+    def _over_budget_result(self, context: Dict[str, Any], partial: str, tokens: int) -> Dict[str, Any]:
+        """Result for an abandoned consolidation, salvaging the partial enriched context"""
+        try:
+            salvaged = json_io.loads_lenient(partial)
+        except json_io.JSONDecodeError:
+            salvaged = None
+        
+        if isinstance(salvaged, dict) and isinstance(salvaged.get("enriched_context"), str):
+            enriched = salvaged["enriched_context"]
+        else:
+            enriched = partial
+        
+        return {
+            "enriched_context": enriched or context.get("original_context", ""),
+            "sources_used": {},
+            "improvements": [],
+            "estimated_tokens": tokens,
+            "quality_score": 0.0,
+            "over_budget": True
+        }
+    
+    def _fallback_result(self, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Consolidation result that passes the original context through unchanged"""
+        return {
+            "enriched_context": context.get("original_context", ""),
+            "sources_used": {},
+            "improvements": [],
+            "estimated_tokens": 0,
+            "quality_score": 0.0
+        }
+    
+    def _dedupe_results(self, sub_results: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """Keep only the first result per (source, query) so repeats are not fed to the LLM twice"""
+        deduped = {}
+        for source, results in sub_results.items():
+            by_query = {}
+            for result in results:
+                by_query.setdefault(result.get("query"), result)
+            deduped[source] = list(by_query.values())
+        return deduped
+    
+    def _unsaved_results(self, sub_results: Dict[str, List[Dict]]) -> Tuple[Dict[str, List[Dict]], Dict[str, List[str]]]:
+        """
+        Drop results already written to rough/ within the TTL
         
+        Returns the remaining results per source together with the content
+        keys of their successful entries; _save_to_rough_folder marks those
+        keys as seen only once the source's write has succeeded.
+        """
+        now = time.monotonic()
+        self._seen = {
+            key: saved_at for key, saved_at in self._seen.items()
+            if now - saved_at < SEEN_RESULT_TTL_SECONDS
+        }
+        
+        unsaved = {}
+        keys = {}
+        for source, results in sub_results.items():
+            novel = []
+            novel_keys = []
+            for result in results:
+                # Failures are always saved so a later successful retry is not mistaken for a repeat
+                if result.get("success"):
+                    # Keyed on the content, so an updated answer to the same query is saved again
+                    key = hashlib.sha256(source.encode("utf-8") + b"::" + json_io.dumps_bytes(result, sort_keys=True)).hexdigest()
+                    if key in self._seen:
+                        continue
+                    novel_keys.append(key)
+                novel.append(result)
+            unsaved[source] = novel
+            keys[source] = novel_keys
+        return unsaved, keys
+    
+    async def _save_to_rough_folder(self, results: Dict[str, List[Dict]], keys: Dict[str, List[str]]):
+        """Save raw sub-agent results to rough/ folder, marking each source's results seen once written"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
-        for source, source_results in results.items():
-            if source_results:
-                file_path = self.rough_folder / f"{timestamp}_{source}.json"
-                file_path.write_text(json.dumps(source_results, indent=2))
-                self.log(f"Saved {source} results to {file_path}")
+        writes = {
+            source: self.rough_folder / f"{timestamp}_{source}.json"
+            for source, source_results in results.items() if source_results
+        }
+        
+        # Each worker thread encodes its own source, so serialization runs off the loop too
+        digests = await asyncio.gather(*[
+            asyncio.to_thread(self._write_snapshot, source, file_path, results[source])
+            for source, file_path in writes.items()
+        ], return_exceptions=True)
+        
+        saved_at = time.monotonic()
+        for (source, file_path), digest in zip(writes.items(), digests):
+            if isinstance(digest, Exception):
+                # Left unmarked, so the next consolidation retries the write
+                self.log("Failed to save %s results to %s: %s", source, file_path, digest, level="WARNING")
+                continue
+            if digest is None:
+                self.log("Skipped unchanged %s snapshot", source)
+            else:
+                self._last_snapshot[source] = digest
+                self.log("Saved %s results to %s", source, file_path)
+            self._seen.update(dict.fromkeys(keys[source], saved_at))
     
-    def _build_consolidation_prompt(self, context: Dict[str, Any]) -> str:
+    def _write_snapshot(self, source: str, file_path: Path, source_results: List[Dict]) -> Optional[str]:
+        """Encode and write one source's results; returns the content digest, or None if unchanged"""
+        data = json_io.dumps_bytes(source_results)
+        digest = hashlib.sha256(data).hexdigest()
+        if self._last_snapshot.get(source) == digest:
+            return None
+        json_io.write_bytes_atomic(file_path, data)
+        return digest
+    
+    def _build_consolidation_prompt(self, context: Dict[str, Any], sub_results: Dict[str, List[Dict]]) -> str:
         """Build consolidation prompt"""
         
-        sub_results = context.get("sub_agent_results", {})
-        
-        results_text = ""
+        parts: List[str] = []
         for source, results in sub_results.items():
-            results_text += f"\n\n=== {source.upper()} RESULTS ===\n"
+            parts.append(f"\n\n=== {source.upper()} RESULTS ===\n")
             for result in results:
                 if result.get("success"):
-                    results_text += f"\nQuery: {result['query']}\n"
-                    results_text += f"Result: {result['result']}\n"
+                    text = str(result['result'])
+                    fitted, _ = self.token_counter.fit(text, MAX_RESULT_TOKENS)
+                    if len(fitted) < len(text):
+                        text = fitted + " [...]"
+                    parts.append(f"\nQuery: {result['query']}\nResult: {text}\n")
+        results_text = "".join(parts)
         
         return f"""Consolidate the following research results:
 
@@ -103,14 +262,4 @@ ORIGINAL CONTEXT:
 
 SUB-AGENT RESEARCH RESULTS:
 {results_text}
-
-Instructions:
-1. Extract ONLY information directly relevant to the task
-2. Deduplicate and normalize findings
-3. Merge with original context coherently
-4. Ensure significant improvement over original
-5. Track sources for attribution
-6. Estimate token count of enriched context
-
-Return JSON with: enriched_context, sources_used, improvements, estimated_tokens, quality_score, conflicts (if any)
 """
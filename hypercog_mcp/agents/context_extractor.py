@@ -1,18 +1,50 @@
-import json
+import os
+import re
+import time
 import asyncio
+import hashlib
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from collections import deque, OrderedDict
+from itertools import islice
 from .base_agent import BaseAgent
+from ..config.settings import get_settings
+from ..utils import json_io
+from ..utils.json_io import write_json
+
+TEXT_SUFFIXES = frozenset({".md", ".txt", ".py", ".js", ".json"})
+FILE_READ_CONCURRENCY = 16
+
+_WORD_RE = re.compile(r"\S+")
+COMPLEXITY_WORD_LIMIT = 200
+
+# Identical contexts re-sent within this window (e.g. a retried enrich) reuse the earlier extraction
+EXTRACTION_CACHE_TTL_SECONDS = 60.0
+EXTRACTION_CACHE_ENTRIES = 64
+
+# Checked in priority order; the leading \b anchors keywords to word starts so "implementation" still counts
+_TASK_TYPE_PATTERNS = (
+    ("implementation", re.compile(r"\b(?:implement|create|build|develop)", re.IGNORECASE)),
+    ("debugging", re.compile(r"\b(?:fix|debug|error|issue)", re.IGNORECASE)),
+    ("refactoring", re.compile(r"\b(?:refactor|improve|optimize)", re.IGNORECASE)),
+    ("explanation", re.compile(r"\b(?:explain|understand|how\s+does)", re.IGNORECASE)),
+)
 
 class ContextExtractor(BaseAgent):
     """Extracts session context and saves to prompt_store/"""
     
+    __slots__ = ("storage_root", "prompt_store", "max_file_bytes", "_cache")
+    
     def __init__(self, storage_root: Path):
         super().__init__("ContextExtractor")
         self.storage_root = storage_root
         self.prompt_store = storage_root / "prompt_store"
         self.prompt_store.mkdir(parents=True, exist_ok=True)
+        # Larger text files are listed without content so one huge attachment cannot exhaust memory
+        self.max_file_bytes = get_settings().max_attached_file_bytes
+        # blake2b of the canonical context -> (monotonic time, extraction), oldest first
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
     
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -26,54 +58,94 @@ class ContextExtractor(BaseAgent):
                 "user_intent": Optional[str]
             }
         """
+        cache_key = self._cache_key(context)
+        if cache_key is not None:
+            entry = self._cache.get(cache_key)
+            if entry is not None and time.monotonic() - entry[0] < EXTRACTION_CACHE_TTL_SECONDS:
+                self._cache.move_to_end(cache_key)
+                self.log("Reusing extraction for identical context (session %s)", entry[1]["session_id"])
+                return entry[1]
+        
         self.log("Extracting session context...")
         
         session_id = context.get("session_id", datetime.now().strftime("%Y%m%d_%H%M%S"))
         
+        # File reads, the workspace walk and intent analysis are independent, so overlap them
+        attached_files, workspace_context, intent_analysis = await asyncio.gather(
+            self._process_attached_files(context.get("attached_files", [])),
+            self._extract_workspace_context(context.get("workspace_path")),
+            self._analyze_intent(
+                context.get("session_context", ""),
+                context.get("user_intent")
+            )
+        )
+        
         extraction_result = {
             "session_id": session_id,
             "timestamp": datetime.now().isoformat(),
             "session_context": context.get("session_context", ""),
-            "attached_files": await self._process_attached_files(
-                context.get("attached_files", [])
-            ),
-            "workspace_context": await self._extract_workspace_context(
-                context.get("workspace_path")
-            ),
-            "intent_analysis": await self._analyze_intent(
-                context.get("session_context", ""),
-                context.get("user_intent")
-            )
+            "attached_files": attached_files,
+            "workspace_context": workspace_context,
+            "intent_analysis": intent_analysis
         }
         
         context_file = self.prompt_store / f"{session_id}_context.json"
-        context_file.write_text(json.dumps(extraction_result, indent=2))
+        await asyncio.to_thread(write_json, context_file, extraction_result)
         
-        self.log(f"Context extracted and saved to {context_file}")
+        self.log("Context extracted and saved to %s", context_file)
         
-        return {
+        result = {
             "session_id": session_id,
             "context_file": str(context_file),
             "metadata": extraction_result
         }
+        
+        if cache_key is not None:
+            self._cache[cache_key] = (time.monotonic(), result)
+            self._cache.move_to_end(cache_key)
+            while len(self._cache) > EXTRACTION_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        
+        return result
+    
+    @staticmethod
+    def _cache_key(context: Dict[str, Any]) -> Optional[str]:
+        """Stable digest of the context, or None if it holds values JSON cannot encode"""
+        try:
+            canonical = json_io.dumps_bytes(context, sort_keys=True)
+        except TypeError:
+            return None
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
     
     async def _process_attached_files(self, files: List[Dict]) -> List[Dict]:
         """Process attached files and extract their content"""
-        processed = []
-        
-        for file_info in files:
-            file_path = Path(file_info.get("path", ""))
-            
-            if file_path.exists():
-                processed.append({
-                    "path": str(file_path),
-                    "name": file_path.name,
-                    "size": file_path.stat().st_size,
-                    "type": file_path.suffix,
-                    "content": file_path.read_text() if file_path.suffix in [".md", ".txt", ".py", ".js", ".json"] else None
-                })
-        
-        return processed
+        semaphore = asyncio.Semaphore(FILE_READ_CONCURRENCY)
+        
+        async def read_one(file_info: Dict) -> Optional[Dict]:
+            async with semaphore:
+                return await asyncio.to_thread(self._read_attached_file, Path(file_info.get("path", "")))
+        
+        processed = await asyncio.gather(*[read_one(file_info) for file_info in files])
+        return [file_data for file_data in processed if file_data is not None]
+    
+    def _read_attached_file(self, file_path: Path) -> Optional[Dict]:
+        """Stat and read a single attached file, or None if it does not exist"""
+        try:
+            size = file_path.stat().st_size
+        except FileNotFoundError:
+            return None
+        
+        content = None
+        if file_path.suffix in TEXT_SUFFIXES and size <= self.max_file_bytes:
+            content = file_path.read_text()
+        
+        return {
+            "path": str(file_path),
+            "name": file_path.name,
+            "size": size,
+            "type": file_path.suffix,
+            "content": content
+        }
     
     async def _extract_workspace_context(self, workspace_path: Optional[str]) -> Dict[str, Any]:
         """Extract relevant workspace context"""
@@ -87,23 +159,34 @@ class ContextExtractor(BaseAgent):
         return {
             "path": str(workspace),
             "name": workspace.name,
-            "structure": await self._get_directory_structure(workspace)
+            "structure": await asyncio.to_thread(self._get_directory_structure, workspace)
         }
     
-    async def _get_directory_structure(self, path: Path, max_depth: int = 2) -> Dict:
+    def _get_directory_structure(self, path: Path, max_depth: int = 2) -> Dict:
         """Get directory structure up to max_depth"""
+        structure = {}
         if max_depth == 0:
-            return {}
+            return structure
         
-        structure = {}
-        try:
-            for item in path.iterdir():
-                if item.is_dir() and not item.name.startswith('.'):
-                    structure[item.name] = await self._get_directory_structure(item, max_depth - 1)
-                elif item.is_file():
-                    structure[item.name] = "file"
-        except PermissionError:
-            pass
+        # Breadth-first over (directory, node to fill, remaining depth); scandir entries cache d_type
+        pending = deque([(path, structure, max_depth)])
+        while pending:
+            directory, node, depth = pending.popleft()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            if entry.name.startswith('.'):
+                                continue
+                            child = {}
+                            node[entry.name] = child
+                            # Symlinked directories are listed but not entered, so link cycles cannot loop
+                            if depth > 1 and not entry.is_symlink():
+                                pending.append((entry.path, child, depth - 1))
+                        elif entry.is_file():
+                            node[entry.name] = "file"
+            except PermissionError:
+                pass
         
         return structure
     
@@ -117,26 +200,19 @@ class ContextExtractor(BaseAgent):
     
     def _infer_task_type(self, context: str) -> str:
         """Simple intent classification"""
-        context_lower = context.lower()
-        
-        if any(word in context_lower for word in ["implement", "create", "build", "develop"]):
-            return "implementation"
-        elif any(word in context_lower for word in ["fix", "debug", "error", "issue"]):
-            return "debugging"
-        elif any(word in context_lower for word in ["refactor", "improve", "optimize"]):
-            return "refactoring"
-        elif any(word in context_lower for word in ["explain", "understand", "how does"]):
-            return "explanation"
-        else:
-            return "general"
+        for task_type, pattern in _TASK_TYPE_PATTERNS:
+            if pattern.search(context):
+                return task_type
+        return "general"
     
     def _estimate_complexity(self, context: str) -> str:
         """Estimate task complexity"""
-        word_count = len(context.split())
+        # Count lazily and stop at the highest threshold instead of splitting the whole context
+        word_count = sum(1 for _ in islice(_WORD_RE.finditer(context), COMPLEXITY_WORD_LIMIT))
         
         if word_count < 50:
             return "low"
-        elif word_count < 200:
+        elif word_count < COMPLEXITY_WORD_LIMIT:
             return "medium"
         else:
             return "high"
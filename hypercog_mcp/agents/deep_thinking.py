@@ -1,15 +1,36 @@
-import json
+import re
 import asyncio
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple, Optional
 from .base_agent import BaseAgent
+from ..utils import json_io
+from ..llm_cache import LLMResponseCache
+
+_WORD_RE = re.compile(r"[a-z]+")
+_CRITICAL_WORDS = frozenset({"must", "required", "critical", "essential"})
+_IMPORTANT_WORDS = frozenset({"should", "important", "necessary"})
+
+# Prompt size caps: understanding keeps its head and tail, history keeps only recent gap lists
+MAX_UNDERSTANDING_CHARS = 8000
+MAX_HISTORY_ITEMS = 2
+_TRUNCATION_MARKER = "\n...[truncated]...\n"
+
+class SearchQueries(NamedTuple):
+    """Query lists per sub-agent; field names match the orchestrator's sub-agent registry"""
+    perplexity: List[str]
+    file_search: List[str]
+    cognee_kg: List[str]
+    cognee_vector: List[str]
 
 class DeepThinkingAgent(BaseAgent):
     """Deep Thinking Agent using Hermeneutic Circle methodology"""
     
-    def __init__(self, prompt_file: Path, llm_client):
+    __slots__ = ("llm_client", "response_cache", "max_iterations")
+    
+    def __init__(self, prompt_file: Path, llm_client, response_cache: Optional[LLMResponseCache] = None):
         super().__init__("DeepThinkingAgent", prompt_file)
         self.llm_client = llm_client
+        self.response_cache = response_cache or LLMResponseCache()
         self.max_iterations = 3
     
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
@@ -27,32 +48,42 @@ class DeepThinkingAgent(BaseAgent):
             {
                 "iterations": List[Dict],
                 "final_gaps": Dict,
-                "search_queries": Dict
+                "search_queries": SearchQueries
             }
         """
         self.log("Starting Deep Thinking with Hermeneutic Circle...")
         
         iterations = []
+        # Each iteration is serialized once when it lands; prompts join the parts instead of redumping the list
+        history_parts: List[str] = []
         current_understanding = context.get("current_context", "")
         
+        # The evaluation feedback is identical for every iteration, so serialize it once
+        evaluation_json = json_io.dumps(context.get("evaluation", {}), indent=True)
+        
         for i in range(1, self.max_iterations + 1):
-            self.log(f"Iteration {i}/{self.max_iterations}")
+            self.log("Iteration %d/%d", i, self.max_iterations)
             
             iteration_result = await self._hermeneutic_iteration(
                 iteration_num=i,
                 task=context.get("task", ""),
                 current_understanding=current_understanding,
-                previous_iterations=iterations,
-                evaluation=context.get("evaluation", {})
+                history_parts=history_parts,
+                evaluation_json=evaluation_json
             )
             
             iterations.append(iteration_result)
+            history_parts.append(json_io.dumps({
+                "iteration": iteration_result.get("iteration", i),
+                "gaps_identified": iteration_result.get("gaps_identified", [])
+            }, indent=True))
             current_understanding = iteration_result.get("refined_understanding", current_understanding)
         
-        final_gaps = await self._synthesize_gaps(iterations)
-        search_queries = await self._craft_search_queries(final_gaps, context)
+        # Gap synthesis is pure CPU work and query crafting depends on its output
+        final_gaps = self._synthesize_gaps(iterations)
+        search_queries = self._craft_search_queries(final_gaps, context)
         
-        self.log("Deep Thinking complete")
+        self.log("Deep Thinking complete, LLM response cache: %s", self.response_cache.stats())
         
         return {
             "iterations": iterations,
@@ -65,26 +96,26 @@ class DeepThinkingAgent(BaseAgent):
         iteration_num: int,
         task: str,
         current_understanding: str,
-        previous_iterations: List[Dict],
-        evaluation: Dict
+        history_parts: List[str],
+        evaluation_json: str
     ) -> Dict[str, Any]:
         """Single iteration of hermeneutic circle"""
         
         prompt = self._build_iteration_prompt(
-            iteration_num, task, current_understanding, previous_iterations, evaluation
+            iteration_num, task, current_understanding, history_parts, evaluation_json
         )
         
-        response = await self.llm_client.chat_completion(
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
+        response = await self.response_cache.chat_completion(
+            self.llm_client,
+            messages=self._build_messages(prompt),
+            response_format={"type": "json_object"},
+            prompt_cache_key=self.name,
+            validate=json_io.loads_lenient
         )
         
         try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
+            result = json_io.loads_lenient(response)
+        except json_io.JSONDecodeError:
             result = {
                 "iteration": iteration_num,
                 "understanding": "Failed to parse",
@@ -99,14 +130,15 @@ class DeepThinkingAgent(BaseAgent):
         iteration_num: int,
         task: str,
         current_understanding: str,
-        previous_iterations: List[Dict],
-        evaluation: Dict
+        history_parts: List[str],
+        evaluation_json: str
     ) -> str:
         """Build prompt for hermeneutic iteration"""
         
         previous_context = ""
-        if previous_iterations:
-            previous_context = f"\nPREVIOUS ITERATIONS:\n{json.dumps(previous_iterations, indent=2)}\n"
+        if history_parts:
+            previous_iterations_json = "[\n" + ",\n".join(history_parts[-MAX_HISTORY_ITEMS:]) + "\n]"
+            previous_context = f"\nPREVIOUS ITERATIONS:\n{previous_iterations_json}\n"
         
         return f"""HERMENEUTIC CIRCLE ITERATION {iteration_num}/3
 
@@ -114,10 +146,10 @@ TASK:
 {task}
 
 CURRENT UNDERSTANDING (WHOLE):
-{current_understanding}
+{self._truncate_middle(current_understanding, MAX_UNDERSTANDING_CHARS)}
 
 EVALUATION FEEDBACK:
-{json.dumps(evaluation, indent=2)}
+{evaluation_json}
 {previous_context}
 
 Instructions for Iteration {iteration_num}:
@@ -125,31 +157,35 @@ Instructions for Iteration {iteration_num}:
 {'- Deeper analysis: Re-examine gaps in context of the whole, find hidden dependencies' if iteration_num == 2 else ''}
 {'- Synthesis: Final refinement, prioritize gaps by criticality' if iteration_num == 3 else ''}
 
-Return JSON with:
-- iteration: {iteration_num}
-- understanding: "your updated understanding"
-- gaps_identified: ["gap1", "gap2", ...]
-- refined_understanding: "synthesized whole understanding"
+Return the per-iteration JSON response with iteration: {iteration_num}
 """
     
-    async def _synthesize_gaps(self, iterations: List[Dict]) -> Dict[str, List[str]]:
+    def _truncate_middle(self, text: str, max_chars: int) -> str:
+        """Elide the middle of text so it fits max_chars, keeping the opening and the latest content"""
+        if len(text) <= max_chars:
+            return text
+        half = (max_chars - len(_TRUNCATION_MARKER)) // 2
+        return text[:half] + _TRUNCATION_MARKER + text[-half:]
+    
+    def _synthesize_gaps(self, iterations: List[Dict]) -> Dict[str, List[str]]:
         """Synthesize final knowledge gaps from all iterations"""
         
         all_gaps = []
         for iteration in iterations:
             all_gaps.extend(iteration.get("gaps_identified", []))
         
-        unique_gaps = list(set(all_gaps))
-        
-        critical = [g for g in unique_gaps if any(
-            word in g.lower() for word in ["must", "required", "critical", "essential"]
-        )]
+        # dict.fromkeys keeps first-seen order, unlike set()
+        unique_gaps = list(dict.fromkeys(all_gaps))
         
-        important = [g for g in unique_gaps if g not in critical and any(
-            word in g.lower() for word in ["should", "important", "necessary"]
-        )]
-        
-        supplementary = [g for g in unique_gaps if g not in critical and g not in important]
+        critical, important, supplementary = [], [], []
+        for gap in unique_gaps:
+            words = set(_WORD_RE.findall(gap.lower()))
+            if words & _CRITICAL_WORDS:
+                critical.append(gap)
+            elif words & _IMPORTANT_WORDS:
+                important.append(gap)
+            else:
+                supplementary.append(gap)
         
         return {
             "critical": critical,
@@ -157,26 +193,16 @@ Return JSON with:
             "supplementary": supplementary
         }
     
-    async def _craft_search_queries(self, gaps: Dict[str, List[str]], context: Dict) -> Dict[str, List[str]]:
+    def _craft_search_queries(self, gaps: Dict[str, List[str]], context: Dict) -> SearchQueries:
         """Craft targeted search queries for each sub-agent"""
         
         task = context.get("task", "")
         
-        queries = {
-            "perplexity": [],
-            "file_search": [],
-            "cognee_kg": [],
-            "cognee_vector": []
-        }
-        
-        for gap in gaps.get("critical", []) + gaps.get("important", []):
-            queries["perplexity"].append(f"{task}: {gap}")
-            queries["cognee_vector"].append(gap)
-            
-            if "how" in gap.lower() or "what" in gap.lower():
-                queries["cognee_kg"].append(gap)
-            
-            if "documentation" in gap.lower() or "api" in gap.lower():
-                queries["file_search"].append(gap)
+        targeted = [(gap, gap.lower()) for gap in gaps.get("critical", []) + gaps.get("important", [])]
         
-        return queries
+        return SearchQueries(
+            perplexity=[f"{task}: {gap}" for gap, _ in targeted],
+            file_search=[gap for gap, lowered in targeted if "documentation" in lowered or "api" in lowered],
+            cognee_kg=[gap for gap, lowered in targeted if "how" in lowered or "what" in lowered],
+            cognee_vector=[gap for gap, _ in targeted]
+        )
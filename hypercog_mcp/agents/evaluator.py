@@ -1,21 +1,165 @@
-import json
+import re
+import time
 import asyncio
+import hashlib
+import functools
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from .base_agent import BaseAgent
+from ..utils import json_io
+from .schemas import EvaluationResult, EnhancedEvaluationResult, json_schema_format
+from ..config.settings import get_settings
+from ..llm_cache import LLMResponseCache, CacheBackend, MemoryCacheBackend
 from ..sub_agents.perplexity.agent import PerplexityAgent
 
+_EVALUATION_FORMAT = json_schema_format(EvaluationResult)
+_ENHANCED_EVALUATION_FORMAT = json_schema_format(EnhancedEvaluationResult)
+
+# Claim keywords are anchored to word starts so "versions" or "APIs" still count
+_CLAIM_RE = re.compile(r"\b(?:version|api|library|framework|method|function|uses|requires)", re.IGNORECASE)
+MAX_TECHNICAL_CLAIMS = 5
+
+# Checked in order; domain keywords must be whole words (plural allowed) so "ai" does not match "maintain"
+_DOMAIN_PATTERNS = tuple(
+    (domain, re.compile(r"\b(?:" + "|".join(map(re.escape, keywords)) + r")s?\b", re.IGNORECASE))
+    for domain, keywords in (
+        ("web", ("react", "javascript", "html", "css", "frontend", "web")),
+        ("ai/ml", ("ai", "machine learning", "llm", "model", "training", "neural")),
+        ("devops", ("docker", "kubernetes", "deployment", "ci/cd", "infrastructure")),
+        ("database", ("sql", "database", "postgresql", "mongodb", "redis")),
+        ("backend", ("api", "server", "backend", "microservice")),
+    )
+)
+
+@functools.lru_cache(maxsize=32)
+def _technical_claims(session_context: str) -> Tuple[str, ...]:
+    """
+    First lines of the context that mention a verifiable technical keyword
+    
+    One regex pass over the whole text finds keyword hits; each hit is
+    widened to its enclosing line, and scanning resumes after that line.
+    The context is never split, and scanning stops at the claim limit.
+    """
+    claims = []
+    pos = 0
+    while len(claims) < MAX_TECHNICAL_CLAIMS:
+        match = _CLAIM_RE.search(session_context, pos)
+        if match is None:
+            break
+        start = session_context.rfind("\n", 0, match.start()) + 1
+        end = session_context.find("\n", match.end())
+        if end == -1:
+            end = len(session_context)
+        claims.append(session_context[start:end].strip())
+        pos = end + 1
+    return tuple(claims)
+
+@functools.lru_cache(maxsize=256)
+def _domain_for(intent: str, prompt: str) -> Optional[str]:
+    """First domain whose keywords appear in the intent or prompt"""
+    text = intent + " " + prompt
+    for domain, pattern in _DOMAIN_PATTERNS:
+        if pattern.search(text):
+            return domain
+    return None
+
+# Upper bound on validations held in memory; older claims are evicted least-recently-used first
+VALIDATION_CACHE_ENTRIES = 2048
+# Upper bound on validations persisted on disk by the orchestrator's file cache
+VALIDATION_CACHE_FILE_ENTRIES = 20000
+# Best practices drift, so a verified claim is re-checked after a week
+VALIDATION_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+_VALIDATION_QUERIES = {
+    "completeness": "What information and context is required to successfully {intent} for: {task}",
+    "accuracy": "Verify current best practices and accuracy: {claim}",
+    "relevance": "Latest developments and current best practices in {domain} for: {task}",
+    "depth": "Deep technical requirements, architecture considerations, and implementation details for {intent}: {task}",
+    "gotchas": "Common pitfalls, edge cases, security concerns, and gotchas when {intent}: {task}",
+}
+
+# Invariant prompt scaffolding, built once; only the per-call data is interpolated between these
+_EVALUATION_REQUEST_TAIL = """
+Assess against world-class standards:
+1. Completeness - All necessary information present
+2. Accuracy - Information is correct and current
+3. Relevance - Context relates to task
+4. Depth - Sufficient detail for implementation
+5. Gotcha Insights - Critical edge cases identified
+
+Return JSON evaluation with fields: sufficient, confidence, reasoning, missing_elements, context_size_assessment, complexity (low, medium, high or expert)
+"""
+
+_SYNTHESIS_HEAD = """INITIAL ASSESSMENT:
+"""
+
+_SYNTHESIS_FINDINGS_HEADER = """
+
+PERPLEXITY VALIDATION FINDINGS:
+"""
+
+# The synthesis instructions never change, so they live in the system message where they form a cacheable prefix
+_SYNTHESIS_SYSTEM_MESSAGE = {"role": "system", "content": """You are an expert evaluator synthesizing an enhanced context evaluation.
+
+Compare the initial assessment against real-time Perplexity findings:
+1. Identify gaps revealed by Perplexity that weren't in initial assessment
+2. Confirm or refute accuracy claims using Perplexity sources
+3. Add newly discovered gotchas and edge cases
+4. Adjust confidence score based on external validation
+5. Update missing_elements with verified gaps
+
+Return enhanced JSON with fields:
+- sufficient (bool)
+- confidence (0-1, adjusted based on validation)
+- reasoning (synthesized from initial + Perplexity)
+- missing_elements (verified list)
+- context_size_assessment (unchanged from initial)
+- complexity (unchanged from initial)
+- external_validation_summary (new - key Perplexity insights)
+- perplexity_sources (new - list of citation URLs)
+- validation_confidence (new - 0-1 score of how well Perplexity validated)
+"""}
+_SYNTHESIS_PROMPT_CACHE_KEY = "evaluator-synthesis"
+
 class EvaluatorAgent(BaseAgent):
     """
     Enhanced Evaluator Agent with real-time Perplexity validation.
     Assesses context sufficiency against world-class standards using external verification.
     """
     
-    def __init__(self, prompt_file: Path, llm_client):
+    __slots__ = ("llm_client", "response_cache", "perplexity_agent", "validation_cache", "validation_timeout", "http_client", "_perplexity_sem")
+    
+    def __init__(
+        self,
+        prompt_file: Path,
+        llm_client,
+        response_cache: Optional[LLMResponseCache] = None,
+        validation_cache: Optional[CacheBackend] = None,
+        http_client=None
+    ):
         super().__init__("EvaluatorAgent", prompt_file)
         self.llm_client = llm_client
+        self.response_cache = response_cache or LLMResponseCache()
         self.perplexity_agent = None
-        self.validation_cache = {}
+        # Optional pooled httpx client handed to the Perplexity agent once it is created
+        self.http_client = http_client
+        # Keyed by a content hash that is stable across processes, so a file backend survives restarts
+        self.validation_cache = validation_cache or MemoryCacheBackend(max_entries=VALIDATION_CACHE_ENTRIES, ttl_seconds=VALIDATION_CACHE_TTL_SECONDS)
+        settings = get_settings()
+        # Shared by every validation so concurrent evaluations cannot flood the Perplexity API
+        self._perplexity_sem = asyncio.Semaphore(settings.perplexity_concurrency)
+        # Per-criterion budget so one hung search cannot stall the rest of the fan-out
+        self.validation_timeout = settings.perplexity_validation_timeout
+    
+    async def warmup(self):
+        """
+        Run one-time setup ahead of the first evaluation.
+        
+        Stays on the loop thread: warnings.catch_warnings in
+        _init_perplexity mutates process-global state and is not
+        thread-safe.
+        """
+        self._init_perplexity()
         
     def _init_perplexity(self):
         """Lazy initialization of Perplexity agent"""
@@ -24,12 +168,12 @@ class EvaluatorAgent(BaseAgent):
                 import warnings
                 with warnings.catch_warnings(record=True) as w:
                     warnings.simplefilter("always")
-                    self.perplexity_agent = PerplexityAgent()
+                    self.perplexity_agent = PerplexityAgent(self.http_client)
                     if w:
                         for warning in w:
-                            self.log(f"Perplexity warning: {warning.message}", "WARNING")
+                            self.log("Perplexity warning: %s", warning.message, level="WARNING")
             except Exception as e:
-                self.log(f"Perplexity agent unavailable: {e}", "WARNING")
+                self.log("Perplexity agent unavailable: %s", e, level="WARNING")
                 self.perplexity_agent = None
     
     async def execute(self, context: Dict[str, Any]) -> Dict[str, Any]:
@@ -71,14 +215,14 @@ class EvaluatorAgent(BaseAgent):
         
         self.log("Starting context evaluation...")
         
-        # Step 1: Initial Static Assessment
-        initial_assessment = await self._perform_static_assessment(
+        # Step 1: Initial Static Assessment, started now so Perplexity validations can overlap it
+        static_task = asyncio.create_task(self._perform_static_assessment(
             session_context,
             attached_files,
             workspace_info,
             user_intent,
             current_prompt
-        )
+        ))
         
         # Step 2: Perplexity-Enhanced Validation (if enabled)
         if enable_perplexity:
@@ -87,7 +231,7 @@ class EvaluatorAgent(BaseAgent):
             if self.perplexity_agent:
                 try:
                     perplexity_validations = await self._validate_with_perplexity(
-                        initial_assessment,
+                        static_task,
                         session_context,
                         user_intent,
                         current_prompt
@@ -95,17 +239,22 @@ class EvaluatorAgent(BaseAgent):
                     
                     # Step 3: Synthesize Final Assessment
                     enhanced_assessment = await self._synthesize_assessment(
-                        initial_assessment,
+                        static_task.result(),
                         perplexity_validations
                     )
                     
-                    self.log(f"Enhanced evaluation complete: sufficient={enhanced_assessment['sufficient']}, confidence={enhanced_assessment['confidence']:.2f}")
+                    self.log("Enhanced evaluation complete: sufficient=%s, confidence=%.2f", enhanced_assessment['sufficient'], enhanced_assessment['confidence'])
+                    self.log("LLM response cache: %s", self.response_cache.stats())
+                    self.log("Perplexity result cache: %s", self.perplexity_agent.cache_stats())
                     return enhanced_assessment
                     
                 except Exception as e:
-                    self.log(f"Perplexity validation failed: {e}, falling back to static assessment", "WARNING")
+                    self.log("Perplexity validation failed: %s, falling back to static assessment", e, level="WARNING")
+        
+        initial_assessment = await static_task
         
-        self.log(f"Static evaluation complete: sufficient={initial_assessment['sufficient']}, confidence={initial_assessment['confidence']:.2f}")
+        self.log("Static evaluation complete: sufficient=%s, confidence=%.2f", initial_assessment['sufficient'], initial_assessment['confidence'])
+        self.log("LLM response cache: %s", self.response_cache.stats())
         return initial_assessment
     
     async def _perform_static_assessment(
@@ -128,19 +277,19 @@ class EvaluatorAgent(BaseAgent):
         
         evaluation_request = self._format_evaluation_request(context)
         
-        response = await self.llm_client.chat_completion(
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": evaluation_request}
-            ],
-            response_format={"type": "json_object"}
+        response = await self.response_cache.chat_completion(
+            self.llm_client,
+            messages=self._build_messages(evaluation_request),
+            response_format=_EVALUATION_FORMAT,
+            prompt_cache_key=self.name,
+            validate=json_io.loads_lenient
         )
         
         return self._parse_evaluation_response(response)
     
     async def _validate_with_perplexity(
         self,
-        initial_assessment: Dict[str, Any],
+        static_assessment: "asyncio.Task[Dict[str, Any]]",
         session_context: str,
         user_intent: str,
         current_prompt: str
@@ -148,173 +297,144 @@ class EvaluatorAgent(BaseAgent):
         """
         Call Perplexity sub-agent to validate each assessment criterion.
         
+        Criteria that do not depend on the static assessment start
+        immediately and run while it is still in flight; completeness
+        and depth are added once it resolves.
+        
         Returns validation results organized by criterion.
         """
         
-        validation_tasks = []
         task_names = []
+        running = []
+        
+        def start(name: str, validation):
+            task_names.append(name)
+            running.append(asyncio.create_task(self._timed_validation(name, validation)))
         
-        # 1. Completeness Validation
-        if initial_assessment.get("missing_elements") or initial_assessment.get("missing_areas"):
-            validation_tasks.append(
-                self._validate_completeness(
-                    current_prompt,
-                    user_intent,
-                    initial_assessment.get("missing_elements", initial_assessment.get("missing_areas", []))
-                )
-            )
-            task_names.append("completeness")
-        
-        # 2. Accuracy Validation
+        # 1. Accuracy Validation
         technical_claims = self._extract_technical_claims(session_context)
         if technical_claims:
-            validation_tasks.append(
-                self._validate_accuracy(technical_claims)
-            )
-            task_names.append("accuracy")
+            start("accuracy", self._validate_accuracy(technical_claims))
         
-        # 3. Relevance Validation (Domain-Specific)
+        # 2. Relevance Validation (Domain-Specific)
         domain = self._extract_domain(user_intent, current_prompt)
         if domain:
-            validation_tasks.append(
-                self._validate_relevance(domain, current_prompt)
-            )
-            task_names.append("relevance")
+            start("relevance", self._run_validation("relevance", domain=domain, task=current_prompt))
         
-        # 4. Depth Validation (for complex tasks)
+        # 3. Gotcha Insights (always check for edge cases)
+        start("gotchas", self._run_validation("gotchas", intent=user_intent, task=current_prompt))
+        
+        try:
+            initial_assessment = await static_assessment
+        except BaseException:
+            await self._cancel_validations(running)
+            raise
+        
+        # 4. Completeness Validation
+        if initial_assessment.get("missing_elements"):
+            start("completeness", self._run_validation("completeness", intent=user_intent, task=current_prompt))
+        
+        # 5. Depth Validation (for complex tasks)
         complexity = initial_assessment.get("complexity", "medium")
         if complexity in ["high", "expert"]:
-            validation_tasks.append(
-                self._validate_depth(current_prompt, user_intent)
-            )
-            task_names.append("depth")
-        
-        # 5. Gotcha Insights (always check for edge cases)
-        validation_tasks.append(
-            self._validate_gotchas(current_prompt, user_intent)
-        )
-        task_names.append("gotchas")
+            start("depth", self._run_validation("depth", intent=user_intent, task=current_prompt))
         
-        # Execute all validations concurrently
-        self.log(f"Running {len(validation_tasks)} Perplexity validations: {', '.join(task_names)}")
-        validation_results = await asyncio.gather(*validation_tasks, return_exceptions=True)
+        # Handle each criterion as soon as it lands
+        self.log("Running %d Perplexity validations: %s", len(running), ", ".join(task_names))
         
-        # Organize results by criterion
         results = {}
-        for i, name in enumerate(task_names):
-            if i < len(validation_results) and not isinstance(validation_results[i], Exception):
-                results[name] = validation_results[i]
-            else:
-                results[name] = []
-                if isinstance(validation_results[i], Exception):
-                    self.log(f"Validation error for {name}: {validation_results[i]}", "WARNING")
-        
-        return results
+        try:
+            for next_done in asyncio.as_completed(running):
+                name, outcome, elapsed = await next_done
+                if isinstance(outcome, Exception):
+                    self.log("Validation error for %s: %s", name, outcome, level="WARNING")
+                    results[name] = []
+                else:
+                    self.log("✓ %s validated in %.2fs", name, elapsed)
+                    results[name] = outcome
+        except BaseException:
+            # Cancelled from above (e.g. a request timeout); don't leave searches running detached
+            await self._cancel_validations(running)
+            raise
+        
+        # Completion order varies run to run; keep criterion order stable for the synthesis prompt
+        return {name: results[name] for name in task_names}
     
-    async def _validate_completeness(
-        self,
-        task: str,
-        intent: str,
-        missing_elements: List[str]
-    ) -> List[Dict[str, str]]:
-        """Validate what information is actually needed for the task."""
+    async def _cancel_validations(self, running: List["asyncio.Task"]):
+        """Cancel in-flight validations and wait until each has unwound and released its connection."""
+        for task in running:
+            task.cancel()
+        await asyncio.gather(*running, return_exceptions=True)
+    
+    async def _timed_validation(self, name: str, validation) -> Tuple[str, Any, float]:
+        """Await one validation under the timeout, returning its criterion, result or exception, and duration."""
+        started = time.perf_counter()
+        try:
+            outcome = await asyncio.wait_for(validation, self.validation_timeout)
+        except Exception as e:
+            outcome = e
+        return name, outcome, time.perf_counter() - started
+    
+    async def _search_perplexity(self, query: str) -> Dict[str, Any]:
+        """Run a Perplexity search under the shared concurrency limit."""
+        async with self._perplexity_sem:
+            return await self.perplexity_agent.search(query)
+    
+    async def _run_validation(self, criterion: str, **fields: str) -> List[Dict[str, str]]:
+        """
+        Run one templated Perplexity validation for a criterion.
+        
+        fields fill the criterion's query template; claim and domain are
+        echoed into the record so findings stay attributable.
+        """
         
-        query = f"What information and context is required to successfully {intent} for: {task}"
+        query = _VALIDATION_QUERIES[criterion].format(**fields)
         
-        result = await self.perplexity_agent.search(query)
+        result = await self._search_perplexity(query)
+        
+        validation = {"criterion": criterion}
+        validation.update((key, fields[key]) for key in ("claim", "domain") if key in fields)
+        validation.update(
+            query=query,
+            findings=result.get("answer", ""),
+            sources=result.get("citations", [])
+        )
         
-        return [{
-            "criterion": "completeness",
-            "query": query,
-            "findings": result.get("answer", ""),
-            "sources": result.get("citations", [])
-        }]
+        return [validation]
     
     async def _validate_accuracy(
         self,
         technical_claims: List[str]
     ) -> List[Dict[str, str]]:
-        """Verify technical claims against current best practices."""
+        """Verify technical claims against current best practices, keeping whichever claims succeed."""
         
-        validations = []
-        
-        for claim in technical_claims[:3]:
-            cache_key = f"accuracy_{hash(claim)}"
-            
-            if cache_key in self.validation_cache:
-                validations.append(self.validation_cache[cache_key])
-                continue
-            
-            query = f"Verify current best practices and accuracy: {claim}"
-            result = await self.perplexity_agent.search(query)
-            
-            validation = {
-                "criterion": "accuracy",
-                "claim": claim,
-                "query": query,
-                "findings": result.get("answer", ""),
-                "sources": result.get("citations", [])
-            }
-            
-            self.validation_cache[cache_key] = validation
-            validations.append(validation)
+        outcomes = await asyncio.gather(*[
+            self._validate_claim(claim) for claim in technical_claims[:3]
+        ], return_exceptions=True)
         
+        validations = []
+        for claim, outcome in zip(technical_claims, outcomes):
+            if isinstance(outcome, Exception):
+                self.log("Accuracy validation failed for claim %r: %s", claim, outcome, level="WARNING")
+            else:
+                validations.append(outcome)
         return validations
     
-    async def _validate_relevance(
-        self,
-        domain: str,
-        task: str
-    ) -> List[Dict[str, str]]:
-        """Check latest developments and relevance in the domain."""
-        
-        query = f"Latest developments and current best practices in {domain} for: {task}"
-        
-        result = await self.perplexity_agent.search(query)
-        
-        return [{
-            "criterion": "relevance",
-            "domain": domain,
-            "query": query,
-            "findings": result.get("answer", ""),
-            "sources": result.get("citations", [])
-        }]
-    
-    async def _validate_depth(
-        self,
-        task: str,
-        intent: str
-    ) -> List[Dict[str, str]]:
-        """Verify deep technical requirements for complex tasks."""
+    async def _validate_claim(self, claim: str) -> Dict[str, str]:
+        """Verify one technical claim, reusing a cached validation when available."""
         
-        query = f"Deep technical requirements, architecture considerations, and implementation details for {intent}: {task}"
+        cache_key = "accuracy_" + hashlib.blake2b(claim.encode("utf-8"), digest_size=16).hexdigest()
         
-        result = await self.perplexity_agent.search(query)
-        
-        return [{
-            "criterion": "depth",
-            "query": query,
-            "findings": result.get("answer", ""),
-            "sources": result.get("citations", [])
-        }]
-    
-    async def _validate_gotchas(
-        self,
-        task: str,
-        intent: str
-    ) -> List[Dict[str, str]]:
-        """Identify common pitfalls and edge cases."""
+        cached = await self.validation_cache.get(cache_key)
+        if cached is not None:
+            return json_io.loads(cached)
         
-        query = f"Common pitfalls, edge cases, security concerns, and gotchas when {intent}: {task}"
+        validation, = await self._run_validation("accuracy", claim=claim)
         
-        result = await self.perplexity_agent.search(query)
-        
-        return [{
-            "criterion": "gotchas",
-            "query": query,
-            "findings": result.get("answer", ""),
-            "sources": result.get("citations", [])
-        }]
+        # Placeholder answers from an unconfigured Perplexity agent must not outlive the restart that fixes it
+        if self.perplexity_agent.api_key:
+            await self.validation_cache.set(cache_key, json_io.dumps(validation))
+        return validation
     
     async def _synthesize_assessment(
         self,
@@ -326,108 +446,56 @@ class EvaluatorAgent(BaseAgent):
         with Perplexity validation findings.
         """
         
-        synthesis_prompt = f"""You are synthesizing an enhanced context evaluation.
-
-INITIAL ASSESSMENT:
-{json.dumps(initial_assessment, indent=2)}
-
-PERPLEXITY VALIDATION FINDINGS:
-{json.dumps(perplexity_validations, indent=2)}
-
-Compare the initial assessment against real-time Perplexity findings:
-1. Identify gaps revealed by Perplexity that weren't in initial assessment
-2. Confirm or refute accuracy claims using Perplexity sources
-3. Add newly discovered gotchas and edge cases
-4. Adjust confidence score based on external validation
-5. Update missing_elements with verified gaps
-
-Return enhanced JSON with fields:
-- sufficient (bool)
-- confidence (0-1, adjusted based on validation)
-- reasoning (synthesized from initial + Perplexity)
-- missing_elements (verified list)
-- context_size_assessment (unchanged from initial)
-- external_validation_summary (new - key Perplexity insights)
-- perplexity_sources (new - list of citation URLs)
-- validation_confidence (new - 0-1 score of how well Perplexity validated)
-"""
-        
-        response = await self.llm_client.chat_completion(
-            messages=[
-                {"role": "system", "content": "You are an expert evaluator synthesizing assessment results."},
-                {"role": "user", "content": synthesis_prompt}
-            ],
-            response_format={"type": "json_object"}
+        synthesis_prompt = "".join((
+            _SYNTHESIS_HEAD,
+            json_io.dumps(initial_assessment, indent=True),
+            _SYNTHESIS_FINDINGS_HEADER,
+            json_io.dumps(perplexity_validations, indent=True)
+        ))
+        
+        response = await self.response_cache.chat_completion(
+            self.llm_client,
+            messages=[_SYNTHESIS_SYSTEM_MESSAGE, {"role": "user", "content": synthesis_prompt}],
+            response_format=_ENHANCED_EVALUATION_FORMAT,
+            prompt_cache_key=_SYNTHESIS_PROMPT_CACHE_KEY,
+            validate=json_io.loads_lenient
         )
         
         return self._parse_evaluation_response(response)
     
     def _extract_technical_claims(self, session_context: str) -> List[str]:
         """Extract technical claims from context that should be verified."""
-        claims = []
-        
-        keywords = ["version", "API", "library", "framework", "method", "function", "uses", "requires"]
-        lines = session_context.split("\n")
-        
-        for line in lines:
-            if any(keyword in line.lower() for keyword in keywords):
-                claims.append(line.strip())
-        
-        return claims[:5]
+        return list(_technical_claims(session_context))
     
     def _extract_domain(self, intent: str, prompt: str) -> Optional[str]:
         """Extract domain/technology from intent and prompt."""
-        domains = {
-            "web": ["react", "javascript", "html", "css", "frontend", "web"],
-            "ai/ml": ["ai", "machine learning", "llm", "model", "training", "neural"],
-            "devops": ["docker", "kubernetes", "deployment", "ci/cd", "infrastructure"],
-            "database": ["sql", "database", "postgresql", "mongodb", "redis"],
-            "backend": ["api", "server", "backend", "microservice"],
-        }
-        
-        text = (intent + " " + prompt).lower()
-        
-        for domain, keywords in domains.items():
-            if any(kw in text for kw in keywords):
-                return domain
-        
-        return None
+        return _domain_for(intent, prompt)
     
     def _format_evaluation_request(self, context: Dict[str, Any]) -> str:
         """Format evaluation request for LLM."""
         session_preview = context['session_context'][:2000] if context['session_context'] else "No context"
         
-        return f"""Evaluate the following context for sufficiency:
-
-USER INTENT: {context['user_intent']}
-CURRENT PROMPT: {context['current_prompt']}
-
-SESSION CONTEXT:
-{session_preview}...
-
-ATTACHED FILES: {len(context['attached_files'])} files
-WORKSPACE INFO: {'Available' if context['workspace_info'] else 'Not available'}
-
-Assess against world-class standards:
-1. Completeness - All necessary information present
-2. Accuracy - Information is correct and current
-3. Relevance - Context relates to task
-4. Depth - Sufficient detail for implementation
-5. Gotcha Insights - Critical edge cases identified
-
-Return JSON evaluation with fields: sufficient, confidence, reasoning, missing_elements, context_size_assessment
-"""
+        return "".join((
+            "Evaluate the following context for sufficiency:\n\n",
+            f"USER INTENT: {context['user_intent']}\n",
+            f"CURRENT PROMPT: {context['current_prompt']}\n\n",
+            f"SESSION CONTEXT:\n{session_preview}...\n\n",
+            f"ATTACHED FILES: {len(context['attached_files'])} files\n",
+            f"WORKSPACE INFO: {'Available' if context['workspace_info'] else 'Not available'}\n",
+            _EVALUATION_REQUEST_TAIL
+        ))
     
     def _parse_evaluation_response(self, response: str) -> Dict[str, Any]:
         """Parse LLM evaluation response into structured format."""
         try:
-            result = json.loads(response)
+            result = json_io.loads_lenient(response)
             
             # Ensure required fields exist
             if "sufficient" not in result:
                 result["sufficient"] = False
             if "confidence" not in result:
                 result["confidence"] = 0.3
+            # Schema-less json_object replies (e.g. the default gpt-4) may use the older key names
             if "reasoning" not in result and "reasons" in result:
                 result["reasoning"] = result["reasons"]
             if "missing_elements" not in result and "missing_areas" in result:
@@ -435,8 +503,8 @@ Return JSON evaluation with fields: sufficient, confidence, reasoning, missing_e
             
             return result
             
-        except json.JSONDecodeError:
-            self.log("Failed to parse evaluation response", "ERROR")
+        except json_io.JSONDecodeError:
+            self.log("Failed to parse evaluation response", level="ERROR")
             return {
                 "sufficient": False,
                 "confidence": 0.3,
@@ -1,12 +1,17 @@
-import json
 import asyncio
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
+from .schemas import OptimizationResult, json_schema_format
+from ..utils import json_io
+
+_OPTIMIZATION_FORMAT = json_schema_format(OptimizationResult)
 
 class OptimizerAgent(BaseAgent):
     """MANDATORY context optimizer - ALL execution paths flow through here"""
     
+    __slots__ = ("llm_client", "optimized_folder")
+    
     def __init__(self, prompt_file: Path, llm_client, storage_root: Path):
         super().__init__("OptimizerAgent", prompt_file)
         self.llm_client = llm_client
@@ -21,7 +26,8 @@ class OptimizerAgent(BaseAgent):
             context: {
                 "task": str,
                 "context_to_optimize": str,
-                "session_id": str
+                "session_id": str,
+                "precomputed_tokens": Optional[int]
             }
         
         Returns:
@@ -41,17 +47,15 @@ class OptimizerAgent(BaseAgent):
         optimization_prompt = self._build_optimization_prompt(context)
         
         response = await self.llm_client.chat_completion(
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": optimization_prompt}
-            ],
-            response_format={"type": "json_object"}
+            messages=self._build_messages(optimization_prompt),
+            response_format=_OPTIMIZATION_FORMAT,
+            prompt_cache_key=self.name
         )
         
         try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
-            self.log("Failed to parse optimization response", "ERROR")
+            result = json_io.loads_lenient(response)
+        except json_io.JSONDecodeError:
+            self.log("Failed to parse optimization response", level="ERROR")
             result = {
                 "optimized_context": {
                     "zone_1_task": context.get("task", ""),
@@ -59,19 +63,23 @@ class OptimizerAgent(BaseAgent):
                     "zone_3_supporting": "",
                     "zone_4_gotchas": ""
                 },
-                "token_count": {"original": 0, "optimized": 0, "reduction_percent": 0},
+                "token_count": {"original": context.get("precomputed_tokens") or 0, "optimized": 0, "reduction_percent": 0},
                 "optimizations_applied": []
             }
         
         await self._save_optimized_context(context.get("session_id", "unknown"), result)
         
         reduction = result.get("token_count", {}).get("reduction_percent", 0)
-        self.log(f"✓ Optimization complete: {reduction}% token reduction")
+        self.log("✓ Optimization complete: %s%% token reduction", reduction)
         
         return result
     
     def _build_optimization_prompt(self, context: Dict[str, Any]) -> str:
         """Build optimization prompt"""
+        # The orchestrator passes its tiktoken count of the context; state it instead of making the model guess
+        precomputed_tokens = context.get("precomputed_tokens")
+        token_line = f"\nORIGINAL TOKEN COUNT (measured): {precomputed_tokens}\n" if precomputed_tokens else ""
+        
         return f"""MANDATORY CONTEXT OPTIMIZATION
 
 TASK:
@@ -79,7 +87,7 @@ TASK:
 
 CONTEXT TO OPTIMIZE:
 {context.get('context_to_optimize', '')}
-
+{token_line}
 Your role is CRITICAL: Optimize this context for optimal LLM performance.
 
 REQUIREMENTS:
@@ -114,5 +122,6 @@ Return JSON with: optimized_context (4 zones), token_count (original, optimized,
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         file_path = self.optimized_folder / f"{session_id}_{timestamp}_optimized.json"
         
-        file_path.write_text(json.dumps(result, indent=2))
-        self.log(f"Saved optimized context to {file_path}")
+        # Encode and write in a worker thread so the loop keeps serving other agents meanwhile
+        await asyncio.to_thread(json_io.write_json, file_path, result, True)
+        self.log("Saved optimized context to %s", file_path)
@@ -0,0 +1,67 @@
+from typing import Any, Dict, List, Literal, Type
+from pydantic import BaseModel, ConfigDict
+
+class StrictModel(BaseModel):
+    """Base for response schemas; forbids extra keys as OpenAI strict mode requires"""
+    model_config = ConfigDict(extra="forbid")
+
+class EvaluationResult(StrictModel):
+    """Static context sufficiency assessment"""
+    sufficient: bool
+    confidence: float
+    reasoning: str
+    missing_elements: List[str]
+    context_size_assessment: str
+    complexity: Literal["low", "medium", "high", "expert"]
+
+class EnhancedEvaluationResult(EvaluationResult):
+    """Assessment synthesized with Perplexity validation findings"""
+    external_validation_summary: str
+    perplexity_sources: List[str]
+    validation_confidence: float
+
+class OptimizedContext(StrictModel):
+    """Context arranged into the four attention zones"""
+    zone_1_task: str
+    zone_2_core: str
+    zone_3_supporting: str
+    zone_4_gotchas: str
+
+class TokenCount(StrictModel):
+    """Token accounting before and after optimization"""
+    original: int
+    optimized: int
+    reduction_percent: float
+
+class OptimizationResult(StrictModel):
+    """Optimizer agent output"""
+    optimized_context: OptimizedContext
+    token_count: TokenCount
+    optimizations_applied: List[str]
+
+class Subtask(StrictModel):
+    """One independently executable unit of a SCRUM breakdown"""
+    id: str
+    name: str
+    description: str
+    context: str
+    dependencies: List[str]
+    execution_order: int
+    success_criteria: str
+
+class BreakdownResult(StrictModel):
+    """SCRUM agent output"""
+    subtasks: List[Subtask]
+    execution_strategy: Literal["sequential", "parallel", "mixed"]
+    integration_plan: str
+
+def json_schema_format(model: Type[BaseModel]) -> Dict[str, Any]:
+    """Build a strict structured-output response_format for a response model"""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": model.__name__,
+            "strict": True,
+            "schema": model.model_json_schema()
+        }
+    }
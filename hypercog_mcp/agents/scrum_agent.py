@@ -1,12 +1,17 @@
-import json
 import asyncio
 from pathlib import Path
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
+from .schemas import BreakdownResult, json_schema_format
+from ..utils import json_io
+
+_BREAKDOWN_FORMAT = json_schema_format(BreakdownResult)
 
 class ScrumAgent(BaseAgent):
     """Breaks down large contexts into manageable subtasks"""
     
+    __slots__ = ("llm_client",)
+    
     def __init__(self, prompt_file: Path, llm_client):
         super().__init__("ScrumAgent", prompt_file)
         self.llm_client = llm_client
@@ -34,17 +39,15 @@ class ScrumAgent(BaseAgent):
         breakdown_prompt = self._build_breakdown_prompt(context)
         
         response = await self.llm_client.chat_completion(
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": breakdown_prompt}
-            ],
-            response_format={"type": "json_object"}
+            messages=self._build_messages(breakdown_prompt),
+            response_format=_BREAKDOWN_FORMAT,
+            prompt_cache_key=self.name
         )
         
         try:
-            result = json.loads(response)
-        except json.JSONDecodeError:
-            self.log("Failed to parse breakdown response", "ERROR")
+            result = json_io.loads_lenient(response)
+        except json_io.JSONDecodeError:
+            self.log("Failed to parse breakdown response", level="ERROR")
             result = {
                 "subtasks": [{
                     "id": "subtask_1",
@@ -59,7 +62,7 @@ class ScrumAgent(BaseAgent):
                 "integration_plan": "N/A"
             }
         
-        self.log(f"Created {len(result.get('subtasks', []))} subtasks")
+        self.log("Created %d subtasks", len(result.get('subtasks', [])))
         
         return result
     
@@ -1,16 +1,20 @@
 #!/usr/bin/env python3
 import click
 import asyncio
-import json
 from pathlib import Path
 from ..config import load_environment, setup_cognee
 from ..orchestrator import HyperCogOrchestrator
 from ..llm_client import LLMClient
+from ..utils.logging import setup_logging, stop_logging
 
 @click.group()
-def cli():
+@click.option("--log-level", default="INFO", type=click.Choice(["DEBUG", "INFO", "WARNING", "ERROR"], case_sensitive=False), help="Minimum level for agent logs on stderr")
+@click.pass_context
+def cli(ctx, log_level):
     """HyperCog MCP - Advanced context enrichment orchestration"""
-    pass
+    # Agents log through the "hypercog" namespace, which has no handler until logging is set up
+    setup_logging(log_level=log_level.upper())
+    ctx.call_on_close(stop_logging)
 
 @cli.command()
 def status():
@@ -1,5 +1,6 @@
 from .cognee_config import setup_cognee
 from .gemini_config import setup_gemini_file_search
 from .env_config import load_environment
+from .settings import Settings, get_settings
 
-__all__ = ['setup_cognee', 'setup_gemini_file_search', 'load_environment']
+__all__ = ['setup_cognee', 'setup_gemini_file_search', 'load_environment', 'Settings', 'get_settings']
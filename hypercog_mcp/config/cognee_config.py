@@ -1,10 +1,17 @@
-import os
+import logging
 from pathlib import Path
-from cognee import config
-import cognee_community_hybrid_adapter_falkor.register
+from typing import Optional
+from .settings import Settings, get_settings
 
-def setup_cognee():
+logger = logging.getLogger("hypercog.config")
+
+def setup_cognee(settings: Optional[Settings] = None):
     """Configure Cognee with FalkorDB for hybrid graph+vector storage"""
+    # Imported here so loading the config package doesn't pay for Cognee or run the adapter registration
+    from cognee import config
+    import cognee_community_hybrid_adapter_falkor.register
+    
+    settings = settings or get_settings()
     
     system_root = Path(__file__).parent.parent / ".cognee_system"
     data_root = Path(__file__).parent.parent / ".cognee_data"
@@ -21,22 +28,22 @@ def setup_cognee():
     
     config.set_graph_db_config({
         "graph_database_provider": "falkordb",
-        "graph_database_url": os.getenv("GRAPH_DB_URL", "localhost"),
-        "graph_database_port": int(os.getenv("GRAPH_DB_PORT", "6379")),
+        "graph_database_url": settings.graph_db_url,
+        "graph_database_port": settings.graph_db_port,
     })
     
     config.set_vector_db_config({
         "vector_db_provider": "falkordb",
-        "vector_db_url": os.getenv("VECTOR_DB_URL", "localhost"),
-        "vector_db_port": int(os.getenv("VECTOR_DB_PORT", "6379")),
+        "vector_db_url": settings.vector_db_url,
+        "vector_db_port": settings.vector_db_port,
     })
     
     config.set_llm_config({
         "llm_provider": "openai",
-        "llm_model": os.getenv("LLM_MODEL", "gpt-4"),
-        "llm_api_key": os.getenv("OPENAI_API_KEY"),
+        "llm_model": settings.llm_model,
+        "llm_api_key": settings.openai_api_key.get_secret_value() if settings.openai_api_key else None,
         "llm_temperature": 0.7
     })
     
-    print("✓ Cognee configured with FalkorDB")
+    logger.info("✓ Cognee configured with FalkorDB")
     return config
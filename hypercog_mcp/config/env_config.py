@@ -1,6 +1,6 @@
-import os
 from pathlib import Path
 from dotenv import load_dotenv
+from .settings import get_settings
 
 def load_environment():
     """Load environment variables from .env file"""
@@ -12,10 +12,11 @@ def load_environment():
     else:
         print("⚠ No .env file found, using system environment variables")
     
-    required_vars = ["OPENAI_API_KEY"]
-    missing = [var for var in required_vars if not os.getenv(var)]
+    # Re-read so values from the freshly loaded .env replace any earlier snapshot
+    get_settings.cache_clear()
+    settings = get_settings()
     
-    if missing:
-        raise ValueError(f"Missing required environment variables: {', '.join(missing)}")
+    if settings.openai_api_key is None:
+        raise ValueError("Missing required environment variables: OPENAI_API_KEY")
     
     return True
@@ -1,16 +1,19 @@
-import os
-import google.generativeai as genai
+import logging
+from .settings import get_settings
+
+logger = logging.getLogger("hypercog.config")
 
 def setup_gemini_file_search():
     """Configure Google Gemini File Search"""
     
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+    api_key = get_settings().google_api_key
+    if api_key is None:
         raise ValueError("GOOGLE_API_KEY environment variable required")
     
-    genai.configure(api_key=api_key)
+    import google.generativeai as genai
+    genai.configure(api_key=api_key.get_secret_value())
     
     store_name = "hypercog-context-store"
     
-    print(f"✓ Gemini File Search configured: {store_name}")
+    logger.info("✓ Gemini File Search configured: %s", store_name)
     return store_name
@@ -0,0 +1,37 @@
+from functools import lru_cache
+from typing import Optional
+from pydantic import NonNegativeInt, PositiveFloat, PositiveInt, SecretStr
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class Settings(BaseSettings):
+    """Typed view of the environment; field names map to upper-case variables"""
+    model_config = SettingsConfigDict(extra="ignore")
+    
+    openai_api_key: Optional[SecretStr] = None
+    google_api_key: Optional[SecretStr] = None
+    perplexity_api_key: Optional[SecretStr] = None
+    
+    llm_model: str = "gpt-4"
+    llm_max_concurrency: PositiveInt = 8
+    llm_structured_outputs: bool = True
+    llm_max_retries: NonNegativeInt = 4
+    
+    hypercog_debug_json: bool = False
+    
+    enable_perplexity_validation: bool = True
+    perplexity_concurrency: PositiveInt = 4
+    perplexity_validation_timeout: PositiveFloat = 30.0
+    perplexity_rps: PositiveFloat = 5.0
+    sub_agent_query_ttl_seconds: float = 900.0
+    agent_max_concurrency: PositiveInt = 8
+    max_attached_file_bytes: PositiveInt = 1024 * 1024
+    
+    graph_db_url: str = "localhost"
+    graph_db_port: int = 6379
+    vector_db_url: str = "localhost"
+    vector_db_port: int = 6379
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Process-wide Settings, read from the environment once on first use"""
+    return Settings()
@@ -0,0 +1,191 @@
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Callable, Optional, Protocol, Tuple
+from .utils import json_io
+
+def cache_key(model: Optional[str], messages: List[Dict[str, str]], temperature: float, **extra: Any) -> str:
+    """Stable sha256 key for an LLM request"""
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        **extra
+    }
+    return hashlib.sha256(json_io.dumps_bytes(payload, sort_keys=True)).hexdigest()
+
+class CacheBackend(Protocol):
+    """Storage interface for cached LLM responses"""
+    
+    async def get(self, key: str) -> Optional[str]:
+        ...
+    
+    async def set(self, key: str, value: str) -> None:
+        ...
+
+class MemoryCacheBackend:
+    """
+    Bounded in-process cache with least-recently-used eviction
+    
+    With ttl_seconds set, entries older than that are dropped on lookup.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # key -> (stored at, value)
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+    
+    async def set(self, key: str, value: str) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class FileCacheBackend:
+    """
+    Cache persisted as one file per key so it survives restarts
+    
+    With ttl_seconds set, entries whose file is older than that are
+    deleted on lookup. With max_entries set, the directory is pruned to
+    the most recently written max_entries files at startup and again
+    after every PRUNE_INTERVAL writes, so it stays bounded across restarts.
+    """
+    
+    PRUNE_INTERVAL = 64
+    
+    def __init__(self, cache_dir: Path, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._writes_since_prune = 0
+        if max_entries is not None:
+            self._prune()
+    
+    async def get(self, key: str) -> Optional[str]:
+        path = self.cache_dir / f"{key}.txt"
+        try:
+            return await asyncio.to_thread(self._read, path)
+        except FileNotFoundError:
+            return None
+    
+    async def set(self, key: str, value: str) -> None:
+        path = self.cache_dir / f"{key}.txt"
+        # Atomic so a concurrent get never reads a half-written entry
+        await asyncio.to_thread(json_io.write_bytes_atomic, path, value.encode("utf-8"))
+        if self.max_entries is not None:
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_INTERVAL:
+                self._writes_since_prune = 0
+                await asyncio.to_thread(self._prune)
+    
+    def _read(self, path: Path) -> Optional[str]:
+        if self.ttl_seconds is not None and time.time() - path.stat().st_mtime > self.ttl_seconds:
+            path.unlink(missing_ok=True)
+            return None
+        return path.read_text(encoding="utf-8")
+    
+    def _prune(self):
+        """Delete expired entries and the oldest ones beyond max_entries"""
+        entries = []
+        for path in self.cache_dir.glob("*.txt"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.ttl_seconds if self.ttl_seconds is not None else None
+        for i, (mtime, path) in enumerate(entries):
+            if i >= self.max_entries or (cutoff is not None and mtime < cutoff):
+                path.unlink(missing_ok=True)
+
+class TieredCacheBackend:
+    """Bounded in-memory LRU in front of a slower persistent backend"""
+    
+    def __init__(self, front: MemoryCacheBackend, back: CacheBackend):
+        self.front = front
+        self.back = back
+    
+    async def get(self, key: str) -> Optional[str]:
+        value = await self.front.get(key)
+        if value is None:
+            value = await self.back.get(key)
+            if value is not None:
+                await self.front.set(key, value)
+        return value
+    
+    async def set(self, key: str, value: str) -> None:
+        await self.front.set(key, value)
+        await self.back.set(key, value)
+
+# Sampled replies are reused for identical requests only within this window
+RESPONSE_CACHE_TTL_SECONDS = 3600
+
+class LLMResponseCache:
+    """Exact-match response cache wrapped around LLMClient.chat_completion"""
+    
+    def __init__(self, backend: Optional[CacheBackend] = None):
+        self.backend = backend or MemoryCacheBackend(ttl_seconds=RESPONSE_CACHE_TTL_SECONDS)
+        self.hits = 0
+        self.misses = 0
+    
+    async def chat_completion(
+        self,
+        llm_client,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict] = None,
+        prompt_cache_key: Optional[str] = None,
+        validate: Optional[Callable[[str], Any]] = None
+    ) -> str:
+        """
+        Return a cached response for an identical request, otherwise call the LLM
+        
+        A fresh reply is stored only if validate (when given) accepts it
+        without raising ValueError, so a malformed reply is returned once
+        but never replayed to identical retries.
+        """
+        key = cache_key(
+            getattr(llm_client, "model", None),
+            messages,
+            temperature,
+            response_format=response_format
+        )
+        
+        cached = await self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        
+        self.misses += 1
+        response = await llm_client.chat_completion(
+            messages=messages,
+            temperature=temperature,
+            response_format=response_format,
+            prompt_cache_key=prompt_cache_key
+        )
+        if validate is not None:
+            try:
+                validate(response)
+            except ValueError:
+                return response
+        await self.backend.set(key, response)
+        return response
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for logging"""
+        return {"hits": self.hits, "misses": self.misses}
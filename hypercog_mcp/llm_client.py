@@ -1,27 +1,70 @@
-import os
-import json
-from typing import List, Dict, Any, Optional
+import random
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator
 import httpx
+from .utils import json_io
+from .config.settings import get_settings
+
+JSON_OBJECT_FORMAT = {"type": "json_object"}
+CHAT_COMPLETIONS_URL = "https://api.openai.com/v1/chat/completions"
+MODELS_URL = "https://api.openai.com/v1/models"
+
+# Transient statuses worth retrying; anything else surfaces immediately
+RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 20.0
+
+def backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Full-jitter exponential delay, or the server's Retry-After seconds when given"""
+    if retry_after:
+        try:
+            return min(float(retry_after), RETRY_MAX_DELAY)
+        except ValueError:
+            pass
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
 
 class LLMClient:
     """Simple LLM client for agent communication"""
     
-    def __init__(self, api_key: str = None, model: str = None):
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        self.model = model or os.getenv("LLM_MODEL", "gpt-4")
+    def __init__(self, api_key: str = None, model: str = None, max_concurrency: int = None):
+        settings = get_settings()
+        self.api_key = api_key or (settings.openai_api_key.get_secret_value() if settings.openai_api_key else None)
+        self.model = model or settings.llm_model
+        self.max_concurrency = max_concurrency or settings.llm_max_concurrency
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Cleared the first time the model rejects json_schema output; later calls send json_object
+        self.structured_outputs = settings.llm_structured_outputs
+        self.max_retries = settings.llm_max_retries
         
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY required")
+        
+        # One pooled HTTP/2 client for the process lifetime so calls reuse TLS sessions
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60.0),
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            }
+        )
     
     async def chat_completion(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.7,
-        response_format: Optional[Dict] = None
+        response_format: Optional[Dict] = None,
+        prompt_cache_key: Optional[str] = None
     ) -> str:
-        """Call OpenAI chat completion API"""
+        """
+        Call OpenAI chat completion API
+        
+        prompt_cache_key groups requests that share a static prefix (the
+        agent's system prompt) so they are routed to the same prompt cache.
+        """
         
-        async with httpx.AsyncClient(timeout=60.0) as client:
+        async with self._semaphore:
             payload = {
                 "model": self.model,
                 "messages": messages,
@@ -29,18 +72,121 @@ class LLMClient:
             }
             
             if response_format:
+                if response_format.get("type") == "json_schema" and not self.structured_outputs:
+                    response_format = JSON_OBJECT_FORMAT
                 payload["response_format"] = response_format
             
-            response = await client.post(
-                "https://api.openai.com/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json=payload
-            )
+            if prompt_cache_key:
+                payload["prompt_cache_key"] = prompt_cache_key
+            
+            response = await self._post(payload)
+            
+            if (
+                response.status_code == 400
+                and payload.get("response_format", {}).get("type") == "json_schema"
+                and "response_format" in response.text
+            ):
+                # Model predates structured outputs; remember that and retry in plain JSON mode
+                self.structured_outputs = False
+                payload["response_format"] = JSON_OBJECT_FORMAT
+                response = await self._post(payload)
             
             response.raise_for_status()
-            data = response.json()
+            # Parse the raw body directly; orjson skips httpx's decode-to-str and stdlib json
+            data = json_io.loads(response.content)
             
             return data["choices"][0]["message"]["content"]
+    
+    async def stream_chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.7,
+        response_format: Optional[Dict] = None,
+        prompt_cache_key: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Call OpenAI chat completion API and yield content deltas as they arrive
+        
+        Lets callers start work on a long reply before generation finishes.
+        The concurrency slot is held until the stream is exhausted or closed.
+        Transient failures are retried only while opening the stream; once
+        content has been yielded an error propagates, since a partial
+        stream can't be replayed transparently.
+        """
+        async with self._semaphore:
+            payload = {
+                "model": self.model,
+                "messages": messages,
+                "temperature": temperature,
+                "stream": True
+            }
+            
+            if response_format:
+                if response_format.get("type") == "json_schema" and not self.structured_outputs:
+                    response_format = JSON_OBJECT_FORMAT
+                payload["response_format"] = response_format
+            
+            if prompt_cache_key:
+                payload["prompt_cache_key"] = prompt_cache_key
+            
+            response = await self._post(payload, stream=True)
+            try:
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[6:]
+                    if data == "[DONE]":
+                        break
+                    choices = json_io.loads(data).get("choices")
+                    if choices:
+                        content = choices[0].get("delta", {}).get("content")
+                        if content:
+                            yield content
+            finally:
+                await response.aclose()
+    
+    async def _post(self, payload: Dict[str, Any], stream: bool = False) -> httpx.Response:
+        """
+        POST a chat completion, retrying transient failures
+        
+        429/5xx responses and transport errors are retried up to
+        max_retries times with full-jitter exponential backoff. A
+        Retry-After header, when present, overrides the computed delay.
+        The last response is returned (or the last error raised) once
+        retries are exhausted. With stream set the body is left unread
+        and the caller must close the response.
+        """
+        # Encoded once up front (orjson when installed) and resent as-is on every retry
+        body = json_io.dumps_bytes(payload)
+        for attempt in range(self.max_retries + 1):
+            try:
+                request = self._client.build_request("POST", CHAT_COMPLETIONS_URL, content=body)
+                response = await self._client.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
+            
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == self.max_retries:
+                return response
+            await response.aclose()
+            await asyncio.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+    
+    async def warmup(self):
+        """
+        Open a pooled connection before the first completion
+        
+        A cheap authenticated GET pays the TCP, TLS and HTTP/2 setup at
+        startup; the connection then stays in the keep-alive pool.
+        """
+        response = await self._client.get(MODELS_URL)
+        await response.aclose()
+    
+    async def aclose(self):
+        """Close the pooled HTTP client"""
+        await self._client.aclose()
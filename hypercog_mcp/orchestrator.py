@@ -1,13 +1,14 @@
+import time
 import asyncio
-import json
-import os
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Awaitable, Callable, Dict, Any, List, Optional, Tuple
+import httpx
 import structlog
 
 from .agents.context_extractor import ContextExtractor
-from .agents.evaluator import EvaluatorAgent
-from .agents.deep_thinking import DeepThinkingAgent
+from .agents.evaluator import EvaluatorAgent, VALIDATION_CACHE_ENTRIES, VALIDATION_CACHE_FILE_ENTRIES, VALIDATION_CACHE_TTL_SECONDS
+from .agents.deep_thinking import DeepThinkingAgent, SearchQueries
 from .agents.consolidator import ConsolidatorAgent
 from .agents.optimizer import OptimizerAgent
 from .agents.scrum_agent import ScrumAgent
@@ -16,8 +17,18 @@ from .sub_agents.cognee_kg.agent import CogneeKGAgent
 from .sub_agents.cognee_vector.agent import CogneeVectorAgent
 from .sub_agents.file_search.agent import FileSearchAgent
 from .utils.token_counter import TokenCounter
+from .config.settings import get_settings
+from .llm_cache import LLMResponseCache, MemoryCacheBackend, FileCacheBackend, TieredCacheBackend
 
-logger = structlog.get_logger()
+logger = structlog.get_logger(__name__)
+
+SUB_AGENT_QUERY_CACHE_ENTRIES = 1024
+
+# Stages reported to the progress callback: evaluated, queries planned, searched, consolidated;
+# the fifth (optimization or SCRUM) completes with the response itself
+ENRICH_PROGRESS_STEPS = 5
+
+ProgressCallback = Callable[[int], Awaitable[None]]
 
 class HyperCogOrchestrator:
     """Main orchestrator following the corrected HyperCog flow"""
@@ -28,22 +39,89 @@ class HyperCogOrchestrator:
         self.max_tokens_per_task = max_tokens
         self.semaphore = asyncio.Semaphore(max_concurrency)
         self.token_counter = TokenCounter()
+        self.llm_cache = LLMResponseCache()
+        # One HTTP/2 pool shared by every Perplexity caller so fan-outs reuse connections
+        self._http = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=max_concurrency * 2, max_keepalive_connections=max_concurrency, keepalive_expiry=60.0)
+        )
+        # Fixed for the process lifetime, so resolved once rather than per enrichment
+        settings = get_settings()
+        self._enable_perplexity = settings.enable_perplexity_validation
+        # Successful sub-agent answers are reused for identical queries within this window
+        self._query_ttl = settings.sub_agent_query_ttl_seconds
         
         prompts_dir = Path(__file__).parent / "agents" / "prompts"
         
         self.context_extractor = ContextExtractor(storage_root)
-        self.evaluator = EvaluatorAgent(prompts_dir / "evaluator_agent.md", llm_client)
-        self.deep_thinker = DeepThinkingAgent(prompts_dir / "deep_thinking_agent.md", llm_client)
+        self.evaluator = EvaluatorAgent(
+            prompts_dir / "evaluator_agent.md",
+            llm_client,
+            self.llm_cache,
+            TieredCacheBackend(
+                MemoryCacheBackend(max_entries=VALIDATION_CACHE_ENTRIES, ttl_seconds=VALIDATION_CACHE_TTL_SECONDS),
+                FileCacheBackend(
+                    storage_root / "perplexity_cache",
+                    max_entries=VALIDATION_CACHE_FILE_ENTRIES,
+                    ttl_seconds=VALIDATION_CACHE_TTL_SECONDS
+                )
+            ),
+            self._http
+        )
+        self.deep_thinker = DeepThinkingAgent(prompts_dir / "deep_thinking_agent.md", llm_client, self.llm_cache)
         self.consolidator = ConsolidatorAgent(prompts_dir / "consolidator_agent.md", llm_client, storage_root)
         self.optimizer = OptimizerAgent(prompts_dir / "optimizer_agent.md", llm_client, storage_root)
         self.scrum_agent = ScrumAgent(prompts_dir / "scrum_agent.md", llm_client)
         
-        self.perplexity = PerplexitySearchAgent()
+        self.perplexity = PerplexitySearchAgent(http_client=self._http)
         self.cognee_kg = CogneeKGAgent()
         self.cognee_vector = CogneeVectorAgent()
         self.file_search = FileSearchAgent()
+        
+        # Keyed by the SearchQueries field names the deep thinker emits
+        self._sub_agents = {
+            "perplexity": self.perplexity,
+            "file_search": self.file_search,
+            "cognee_kg": self.cognee_kg,
+            "cognee_vector": self.cognee_vector
+        }
+        # (agent name, normalized query) -> (stored at, result dict), oldest first. This holds full
+        # result dicts, so raw sub-agent output lives until TTL or LRU eviction regardless of what
+        # enrich() drops; the prompt-side bound is the consolidator's MAX_RESULT_TOKENS truncation
+        self._query_cache: "OrderedDict[Tuple[str, str], Tuple[float, Dict]]" = OrderedDict()
+    
+    async def warmup(self):
+        """
+        Perform lazy agent setup and open pooled connections at startup
+        
+        Runs concurrently and never raises; a failed warmup only means the
+        first enrichment pays that setup cost itself.
+        """
+        steps = {
+            "evaluator": self.evaluator.warmup(),
+            "llm_client": self.llm_client.warmup()
+        }
+        if self.perplexity.api_key:
+            steps["perplexity"] = self._http.head(self.perplexity.base_url)
+        
+        outcomes = await asyncio.gather(*steps.values(), return_exceptions=True)
+        for name, outcome in zip(steps, outcomes):
+            if isinstance(outcome, Exception):
+                logger.warning("warmup_failed", step=name, error=str(outcome))
     
-    async def enrich(self, task: str, context: Dict[str, Any], timeout: float = 300.0) -> Dict[str, Any]:
+    async def aclose(self):
+        """Release pooled network resources held by the LLM client and sub-agents"""
+        await self.llm_client.aclose()
+        await self._http.aclose()
+    
+    async def enrich(
+        self,
+        task: str,
+        context: Dict[str, Any],
+        timeout: float = 300.0,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
         """
         Main HyperCog enrichment flow following corrected flowchart
         
@@ -51,6 +129,8 @@ class HyperCogOrchestrator:
             task: Task description
             context: Session context dictionary
             timeout: Maximum seconds for enrichment (default 5 minutes)
+            progress: Awaited with the completed stage count (out of
+                ENRICH_PROGRESS_STEPS) as the flow advances
             
         Returns:
             Dictionary with status and optimized context
@@ -64,7 +144,7 @@ class HyperCogOrchestrator:
         
         try:
             async with asyncio.timeout(timeout):
-                return await self._enrich_internal(task, context, log)
+                return await self._enrich_internal(task, context, log, progress)
         except asyncio.TimeoutError:
             log.error("enrichment_timeout", timeout=timeout)
             raise
@@ -72,159 +152,237 @@ class HyperCogOrchestrator:
             log.exception("enrichment_failed", error=str(e))
             raise
     
-    async def _enrich_internal(self, task: str, context: Dict[str, Any], log) -> Dict[str, Any]:
+    async def _enrich_internal(
+        self,
+        task: str,
+        context: Dict[str, Any],
+        log,
+        progress: Optional[ProgressCallback]
+    ) -> Dict[str, Any]:
         """Internal enrichment logic"""
         
-        extraction_result = await self.context_extractor.execute(context)
+        # The evaluator only needs the raw session inputs, so run it alongside extraction
+        extraction_result, evaluation = await asyncio.gather(
+            self.context_extractor.execute(context),
+            self._run_evaluator_with_perplexity(
+                context,
+                task,
+                context.get("session_context", "")
+            )
+        )
         session_id = extraction_result["session_id"]
         current_context = extraction_result["metadata"]["session_context"]
         
         log = log.bind(session_id=session_id)
-        
-        # Run enhanced evaluation with Perplexity validation
-        evaluation = await self._run_evaluator_with_perplexity(
-            extraction_result,
-            task,
-            current_context
-        )
+        await self._report_progress(progress, 1, log)
         
         if evaluation["sufficient"]:
             log.info("context_sufficient", confidence=evaluation.get("confidence"))
+            # No enrichment needed; go straight to the optimization stage
+            await self._report_progress(progress, ENRICH_PROGRESS_STEPS - 1, log)
             
-            estimated_tokens = self.token_counter.count_tokens(current_context)
-            
-            if estimated_tokens <= self.max_tokens_per_task:
-                log.info("context_manageable", tokens=estimated_tokens)
-                optimized = await self.optimizer.execute({
-                    "task": task,
-                    "context_to_optimize": current_context,
-                    "session_id": session_id
-                })
-                
-                return {
-                    "status": "ready_for_execution",
-                    "session_id": session_id,
-                    "optimized_context": optimized,
-                    "path": "sufficient_manageable"
-                }
-            else:
-                log.warning("context_too_large", tokens=estimated_tokens, max_tokens=self.max_tokens_per_task)
-                breakdown = await self.scrum_agent.execute({
-                    "task": task,
-                    "context": current_context,
-                    "reason": "Context sufficient but too large for single execution"
-                })
-                
-                subtask_results = await self._execute_subtasks(breakdown["subtasks"], session_id)
-                
-                return {
-                    "status": "subtasks_completed",
-                    "session_id": session_id,
-                    "subtask_results": subtask_results,
-                    "path": "sufficient_too_large_scrum"
-                }
+            return await self._finalize_or_scrum(
+                task,
+                current_context,
+                session_id,
+                "sufficient",
+                "Context sufficient but too large for single execution",
+                log
+            )
         
-        else:
-            log.info("context_insufficient_enriching", missing_areas=evaluation.get("missing_areas", []))
-            
-            thinking_result = await self.deep_thinker.execute({
-                "task": task,
-                "current_context": current_context,
-                "evaluation": evaluation
-            })
-            
-            search_queries = thinking_result["search_queries"]
-            
-            log.info("dispatching_sub_agents", query_counts={k: len(v) for k, v in search_queries.items()})
-            sub_agent_results = await self._dispatch_sub_agents(search_queries)
+        log.info("context_insufficient_enriching", missing_elements=evaluation.get("missing_elements", []))
+        
+        thinking_result = await self.deep_thinker.execute({
+            "task": task,
+            "current_context": current_context,
+            "evaluation": evaluation
+        })
+        
+        search_queries = thinking_result["search_queries"]
+        await self._report_progress(progress, 2, log)
+        
+        log.info("dispatching_sub_agents", query_counts={name: len(queries) for name, queries in zip(search_queries._fields, search_queries)})
+        sub_agent_results = await self._dispatch_sub_agents(search_queries)
+        await self._report_progress(progress, 3, log)
+        
+        log.info("consolidating_results")
+        consolidation = await self.consolidator.execute({
+            "task": task,
+            "original_context": current_context,
+            "sub_agent_results": sub_agent_results,
+            "token_budget": self.max_tokens_per_task
+        })
+        await self._report_progress(progress, 4, log)
+        
+        if consolidation.get("over_budget"):
+            log.warning("consolidation_over_budget", tokens=consolidation.get("estimated_tokens"))
+        
+        # The consolidator's estimated_tokens is self-reported or approximate; the budget
+        # check and the optimizer's prompt get a tiktoken count of the enriched context instead
+        return await self._finalize_or_scrum(
+            task,
+            consolidation["enriched_context"],
+            session_id,
+            "enriched",
+            "Enriched context too large for single execution",
+            log
+        )
+    
+    async def _finalize_or_scrum(
+        self,
+        task: str,
+        context_text: str,
+        session_id: str,
+        path_prefix: str,
+        scrum_reason: str,
+        log,
+        precomputed_tokens: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Optimize context that fits the token budget, otherwise break it down with SCRUM
+        
+        Args:
+            task: Task description
+            context_text: Context to optimize or decompose
+            session_id: Session ID
+            path_prefix: "sufficient" or "enriched", used to label the result path
+            scrum_reason: Reason handed to the SCRUM agent when over budget
+            log: Bound structlog logger
+            precomputed_tokens: Token count the caller already has, if any
             
-            log.info("consolidating_results")
-            consolidation = await self.consolidator.execute({
+        Returns:
+            ready_for_execution result with the optimized context, or
+            subtasks_completed result with per-subtask optimizations
+        """
+        # A missing estimate, or zero for non-empty text (e.g. a consolidation fallback), is treated as unknown
+        estimated_tokens = precomputed_tokens
+        if estimated_tokens is None or (not estimated_tokens and context_text):
+            estimated_tokens = self.token_counter.count_tokens(context_text)
+        estimated_tokens = int(estimated_tokens)
+        
+        if estimated_tokens <= self.max_tokens_per_task:
+            log.info("context_manageable", path=path_prefix, tokens=estimated_tokens)
+            optimized = await self.optimizer.execute({
                 "task": task,
-                "original_context": current_context,
-                "sub_agent_results": sub_agent_results
+                "context_to_optimize": context_text,
+                "session_id": session_id,
+                "precomputed_tokens": estimated_tokens
             })
             
-            enriched_context = consolidation["enriched_context"]
-            estimated_tokens = consolidation.get("estimated_tokens", self.token_counter.count_tokens(enriched_context))
-            
-            if estimated_tokens <= self.max_tokens_per_task:
-                log.info("enriched_context_manageable", tokens=estimated_tokens)
-                optimized = await self.optimizer.execute({
-                    "task": task,
-                    "context_to_optimize": enriched_context,
-                    "session_id": session_id
-                })
-                
-                return {
-                    "status": "ready_for_execution",
-                    "session_id": session_id,
-                    "optimized_context": optimized,
-                    "path": "enriched_manageable"
-                }
-            else:
-                log.warning("enriched_context_too_large", tokens=estimated_tokens)
-                breakdown = await self.scrum_agent.execute({
-                    "task": task,
-                    "context": enriched_context,
-                    "reason": "Enriched context too large for single execution"
-                })
-                
-                subtask_results = await self._execute_subtasks(breakdown["subtasks"], session_id)
-                
-                return {
-                    "status": "subtasks_completed",
-                    "session_id": session_id,
-                    "subtask_results": subtask_results,
-                    "path": "enriched_too_large_scrum"
-                }
+            return {
+                "status": "ready_for_execution",
+                "session_id": session_id,
+                "optimized_context": optimized,
+                "path": f"{path_prefix}_manageable"
+            }
+        
+        log.warning("context_too_large", path=path_prefix, tokens=estimated_tokens, max_tokens=self.max_tokens_per_task)
+        breakdown = await self.scrum_agent.execute({
+            "task": task,
+            "context": context_text,
+            "reason": scrum_reason
+        })
+        
+        subtask_results = await self._execute_subtasks(breakdown["subtasks"], session_id)
+        
+        return {
+            "status": "subtasks_completed",
+            "session_id": session_id,
+            "subtask_results": subtask_results,
+            "path": f"{path_prefix}_too_large_scrum"
+        }
     
-    async def _dispatch_sub_agents(self, search_queries: Dict[str, List[str]]) -> Dict[str, List[Dict]]:
+    @staticmethod
+    async def _report_progress(progress: Optional[ProgressCallback], step: int, log):
+        """Send a progress update; a failed notification never fails the enrichment"""
+        if progress is None:
+            return
+        try:
+            await progress(step)
+        except Exception as e:
+            log.warning("progress_notification_failed", step=step, error=str(e))
+    
+    async def _dispatch_sub_agents(self, search_queries: SearchQueries) -> Dict[str, List[Dict]]:
         """
         Dispatch all sub-agents in parallel with concurrency control
         
+        Searches run in a TaskGroup so that if enrichment is cancelled
+        (e.g. by its timeout) every search is cancelled and has closed its
+        connections before cancellation propagates. Each search settles
+        its own exception, so one failing sub-agent never cancels the others.
+        
         Args:
-            search_queries: Dict mapping agent names to query lists
+            search_queries: Query lists per sub-agent
             
         Returns:
             Dict mapping agent names to results (empty list on failure)
         """
         log = logger.bind()
-        tasks = []
-        
-        if search_queries.get("perplexity"):
-            tasks.append(("perplexity", self._run_with_semaphore(
-                self.perplexity.search(search_queries["perplexity"])
-            )))
+        # Fields unpack positionally alongside their names, so no per-agent key lookups
+        pending = [(name, queries) for name, queries in zip(search_queries._fields, search_queries) if queries]
         
-        if search_queries.get("file_search"):
-            tasks.append(("file_search", self._run_with_semaphore(
-                self.file_search.search(search_queries["file_search"])
-            )))
-        
-        if search_queries.get("cognee_kg"):
-            tasks.append(("cognee_kg", self._run_with_semaphore(
-                self.cognee_kg.search(search_queries["cognee_kg"])
-            )))
-        
-        if search_queries.get("cognee_vector"):
-            tasks.append(("cognee_vector", self._run_with_semaphore(
-                self.cognee_vector.search(search_queries["cognee_vector"])
-            )))
+        async with asyncio.TaskGroup() as tg:
+            handles = [
+                (name, tg.create_task(self._settle(self._cached_search(name, queries))))
+                for name, queries in pending
+            ]
         
         results = {}
-        completed = await asyncio.gather(*[task[1] for task in tasks], return_exceptions=True)
-        
-        for i, (name, _) in enumerate(tasks):
-            if isinstance(completed[i], Exception):
-                log.error("sub_agent_failed", agent=name, error=str(completed[i]))
+        for name, handle in handles:
+            outcome = handle.result()
+            if isinstance(outcome, Exception):
+                log.error("sub_agent_failed", agent=name, error=str(outcome))
                 results[name] = []
             else:
-                results[name] = completed[i]
-                log.info("sub_agent_success", agent=name, result_count=len(completed[i]))
+                results[name] = outcome
         
+        # One summary event instead of one per sub-agent
+        log.info("sub_agents_completed", result_counts={name: len(found) for name, found in results.items()})
         return results
     
+    async def _cached_search(self, name: str, queries: List[str]) -> List[Dict]:
+        """
+        Run one sub-agent's queries, skipping duplicates and recent repeats
+        
+        Queries are normalized (stripped, lowercased) and deduplicated;
+        any answered successfully within SUB_AGENT_QUERY_TTL_SECONDS are
+        served from the cache and only the rest reach the sub-agent.
+        Results come back in first-occurrence query order.
+        """
+        unique = {}
+        for query in queries:
+            unique.setdefault(query.strip().lower(), query.strip())
+        
+        now = time.monotonic()
+        cached = {}
+        for key in unique:
+            entry = self._query_cache.get((name, key))
+            if entry is not None and now - entry[0] < self._query_ttl:
+                cached[key] = entry[1]
+        
+        fresh_queries = [query for key, query in unique.items() if key not in cached]
+        fresh = {}
+        if fresh_queries:
+            results = await self._run_with_semaphore(self._sub_agents[name].search(fresh_queries))
+            for result in results:
+                key = str(result.get("query", "")).strip().lower()
+                fresh[key] = result
+                if result.get("success"):
+                    self._query_cache[(name, key)] = (now, result)
+                    self._query_cache.move_to_end((name, key))
+            while len(self._query_cache) > SUB_AGENT_QUERY_CACHE_ENTRIES:
+                self._query_cache.popitem(last=False)
+        
+        return [cached.get(key) or fresh[key] for key in unique if key in cached or key in fresh]
+    
+    @staticmethod
+    async def _settle(coro):
+        """Await coro, returning its exception instead of raising so TaskGroup siblings keep running"""
+        try:
+            return await coro
+        except Exception as e:
+            return e
+    
     async def _run_with_semaphore(self, coro):
         """Run coroutine with semaphore for concurrency control"""
         async with self.semaphore:
@@ -232,7 +390,10 @@ class HyperCogOrchestrator:
     
     async def _execute_subtasks(self, subtasks: List[Dict], session_id: str) -> List[Dict]:
         """
-        Execute subtasks, each going through optimization
+        Execute subtasks concurrently, each going through optimization
+        
+        Optimizer calls are independent, so they are all dispatched at once
+        under the orchestrator semaphore; results keep the breakdown order.
         
         Args:
             subtasks: List of subtask dictionaries
@@ -244,39 +405,41 @@ class HyperCogOrchestrator:
         log = logger.bind(session_id=session_id, subtask_count=len(subtasks))
         log.info("executing_subtasks")
         
-        results = []
-        
-        for subtask in subtasks:
-            log.info("executing_subtask", subtask_id=subtask['id'], name=subtask['name'])
+        async def run_one(subtask: Dict) -> Dict:
+            log.debug("executing_subtask", subtask_id=subtask['id'], name=subtask['name'])
             
             try:
-                optimized = await self.optimizer.execute({
+                optimized = await self._run_with_semaphore(self.optimizer.execute({
                     "task": subtask["description"],
                     "context_to_optimize": subtask["context"],
                     "session_id": f"{session_id}_subtask_{subtask['id']}"
-                })
-                
-                results.append({
-                    "subtask_id": subtask["id"],
-                    "subtask_name": subtask["name"],
-                    "optimized_context": optimized,
-                    "status": "ready_for_execution"
-                })
-                
+                }))
             except Exception as e:
                 log.error("subtask_failed", subtask_id=subtask['id'], error=str(e))
-                results.append({
+                return {
                     "subtask_id": subtask["id"],
                     "subtask_name": subtask["name"],
                     "error": str(e),
                     "status": "failed"
-                })
+                }
+            
+            log.debug("subtask_optimized", subtask_id=subtask['id'])
+            return {
+                "subtask_id": subtask["id"],
+                "subtask_name": subtask["name"],
+                "optimized_context": optimized,
+                "status": "ready_for_execution"
+            }
+        
+        results = await asyncio.gather(*[run_one(subtask) for subtask in subtasks])
         
+        failed = sum(1 for result in results if result["status"] == "failed")
+        log.info("subtasks_completed", ok=len(results) - failed, failed=failed)
         return results
     
     async def _run_evaluator_with_perplexity(
         self,
-        extraction_result: Dict[str, Any],
+        context: Dict[str, Any],
         task: str,
         current_context: str
     ) -> Dict[str, Any]:
@@ -284,19 +447,19 @@ class HyperCogOrchestrator:
         Run evaluator with enhanced Perplexity validation enabled.
         
         Args:
-            extraction_result: Result from context extraction
+            context: Raw session context dictionary passed to enrich
             task: User's task/prompt
-            current_context: Extracted session context
+            current_context: Session context text
             
         Returns:
             Enhanced evaluation result with external validation
         """
-        enable_perplexity = os.getenv("ENABLE_PERPLEXITY_VALIDATION", "true").lower() == "true"
+        enable_perplexity = self._enable_perplexity
         
         evaluation = await self.evaluator.evaluate(
             session_context=current_context,
-            attached_files=extraction_result.get("attached_files", []),
-            workspace_info=extraction_result.get("workspace_info"),
+            attached_files=context.get("attached_files", []),
+            workspace_info=context.get("workspace_info"),
             user_intent=task,
             current_prompt=task,
             enable_perplexity=enable_perplexity
@@ -42,9 +42,9 @@ os.environ['PYTHONUNBUFFERED'] = '1'
 
 # Now safe to import modules that depend on environment variables
 import asyncio
-import json
+import logging
 import signal
-from typing import Any, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional
 import structlog
 
 from mcp.server import Server
@@ -52,12 +52,16 @@ from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 from pydantic import BaseModel, Field, ValidationError
 
-from .config import setup_cognee
-from .orchestrator import HyperCogOrchestrator
+from .config import setup_cognee, get_settings
+from .orchestrator import HyperCogOrchestrator, ProgressCallback, ENRICH_PROGRESS_STEPS
 from .llm_client import LLMClient
-from .utils.logging import setup_logging
+from .utils.logging import setup_logging, stop_logging
+from .utils import json_io
 
 logger = setup_logging(log_level="INFO")
+# Per-request lines go through plain stdlib logging, queued and rendered as JSON by setup_logging;
+# structlog stays on startup and shutdown paths where its bound context earns its cost
+request_logger = logging.getLogger("hypercog.server")
 
 app = Server("hypercog-mcp")
 
@@ -68,6 +72,24 @@ orchestrator: Optional[HyperCogOrchestrator] = None
 llm_client: Optional[LLMClient] = None
 shutdown_event = asyncio.Event()
 
+# Tool responses are compact JSON; set HYPERCOG_DEBUG_JSON=1 to pretty-print them for reading
+_PRETTY_JSON = get_settings().hypercog_debug_json
+
+# Constant failure content, serialized and wrapped once instead of on every timeout
+_TIMEOUT_CONTENT = TextContent(type="text", text=json_io.dumps({
+    "error": "Enrichment timeout - operation took too long",
+    "status": "failed"
+}, indent=_PRETTY_JSON))
+
+# Same layout as _failure_response; only the JSON-encoded error string is filled in per call
+_UNKNOWN_TOOL_TEMPLATE = (
+    '{\n  "error": %s,\n  "status": "failed"\n}' if _PRETTY_JSON else '{"error":%s,"status":"failed"}'
+)
+
+def _failure_response(payload: Dict[str, Any]) -> list[TextContent]:
+    """Wrap a failure payload as the tool's single JSON text block"""
+    return [TextContent(type="text", text=json_io.dumps(payload, indent=_PRETTY_JSON))]
+
 class EnrichInput(BaseModel):
     """Validated input for hypercog_enrich tool"""
     task: str = Field(..., min_length=1, max_length=10000, description="Task description")
@@ -76,14 +98,12 @@ class EnrichInput(BaseModel):
     workspace_path: Optional[str] = None
     user_intent: Optional[str] = None
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List available MCP tools"""
-    return [
-        Tool(
-            name="hypercog_enrich",
-            description="""HyperCog context enrichment orchestration.
-            
+# The tool schema is static; build it once instead of on every tools/list request
+_TOOLS: list[Tool] = [
+    Tool(
+        name="hypercog_enrich",
+        description="""HyperCog context enrichment orchestration.
+        
 Follows the corrected agent flow:
 1. Extract session context
 2. Evaluate sufficiency
@@ -93,139 +113,140 @@ Follows the corrected agent flow:
 
 ALL paths converge at mandatory optimization before execution.
 """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "task": {
-                        "type": "string",
-                        "description": "The task to enrich context for"
-                    },
-                    "session_context": {
-                        "type": "string",
-                        "description": "Current session context"
-                    },
-                    "attached_files": {
-                        "type": "array",
-                        "description": "List of attached files",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "path": {"type": "string"}
-                            }
-                        },
-                        "default": []
-                    },
-                    "workspace_path": {
-                        "type": "string",
-                        "description": "Workspace directory path",
-                        "default": None
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "task": {
+                    "type": "string",
+                    "description": "The task to enrich context for"
+                },
+                "session_context": {
+                    "type": "string",
+                    "description": "Current session context"
+                },
+                "attached_files": {
+                    "type": "array",
+                    "description": "List of attached files",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "path": {"type": "string"}
+                        }
                     },
-                    "user_intent": {
-                        "type": "string",
-                        "description": "Explicit user intent",
-                        "default": None
-                    }
+                    "default": []
+                },
+                "workspace_path": {
+                    "type": "string",
+                    "description": "Workspace directory path",
+                    "default": None
                 },
-                "required": ["task", "session_context"]
-            }
-        )
-    ]
+                "user_intent": {
+                    "type": "string",
+                    "description": "Explicit user intent",
+                    "default": None
+                }
+            },
+            "required": ["task", "session_context"]
+        }
+    )
+]
 
-@app.call_tool()
-async def call_tool(name: str, arguments: Any) -> list[TextContent]:
-    """
-    Handle tool calls with input validation
-    
-    CRITICAL: Never log to stdout in STDIO MCP servers
-    All logs go to stderr via structlog
-    """
-    log = logger.bind(tool=name)
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List available MCP tools"""
+    return _TOOLS
+
+def _progress_callback() -> Optional[ProgressCallback]:
+    """Build a notifications/progress sender when the client supplied a progressToken"""
+    ctx = app.request_context
+    token = ctx.meta.progressToken if ctx.meta is not None else None
+    if token is None:
+        return None
     
-    if name != "hypercog_enrich":
-        error_msg = f"Unknown tool: {name}"
-        log.error("unknown_tool", tool=name)
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": error_msg,
-                    "status": "failed"
-                }, indent=2)
-            )
-        ]
+    async def send(step: int):
+        await ctx.session.send_progress_notification(token, step, ENRICH_PROGRESS_STEPS)
     
+    return send
+
+async def _handle_enrich(arguments: Any) -> list[TextContent]:
+    """Validate hypercog_enrich arguments and run them through the orchestrator"""
     try:
-        validated = EnrichInput(**arguments)
-        log.info("tool_invoked", task_length=len(validated.task))
+        # Validate the mapping directly in pydantic-core instead of unpacking it into keyword arguments
+        validated = EnrichInput.model_validate(arguments)
+        request_logger.info("tool_invoked", extra={"tool": "hypercog_enrich", "task_length": len(validated.task)})
         
     except ValidationError as e:
-        log.error("input_validation_failed", errors=e.errors())
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": "Input validation failed",
-                    "details": e.errors(),
-                    "status": "failed"
-                }, indent=2)
-            )
-        ]
+        errors = e.errors(include_url=False)
+        request_logger.error("input_validation_failed", extra={"tool": "hypercog_enrich", "errors": errors})
+        return _failure_response({
+            "error": "Input validation failed",
+            "details": errors,
+            "status": "failed"
+        })
     
-    context = {
-        "session_context": validated.session_context,
-        "attached_files": validated.attached_files,
-        "workspace_path": validated.workspace_path,
-        "user_intent": validated.user_intent
-    }
+    # Everything except the task is forwarded as context, dumped in one pydantic-core call
+    context = validated.model_dump(exclude={"task"})
     
     try:
-        result = await orchestrator.enrich(validated.task, context)
-        log.info("tool_completed", status=result.get("status"))
+        result = await orchestrator.enrich(validated.task, context, progress=_progress_callback())
+        request_logger.info("tool_completed", extra={"tool": "hypercog_enrich", "status": result.get("status")})
         
         return [
             TextContent(
                 type="text",
-                text=json.dumps(result, indent=2)
+                text=json_io.dumps(result, indent=_PRETTY_JSON)
             )
         ]
     
     except asyncio.TimeoutError:
-        log.error("tool_timeout")
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": "Enrichment timeout - operation took too long",
-                    "status": "failed"
-                }, indent=2)
-            )
-        ]
+        request_logger.error("tool_timeout", extra={"tool": "hypercog_enrich"})
+        return [_TIMEOUT_CONTENT]
     
     except Exception as e:
-        log.exception("tool_failed", error=str(e))
-        return [
-            TextContent(
-                type="text",
-                text=json.dumps({
-                    "error": str(e),
-                    "status": "failed"
-                }, indent=2)
-            )
-        ]
+        request_logger.exception("tool_failed", extra={"tool": "hypercog_enrich", "error": str(e)})
+        return _failure_response({
+            "error": str(e),
+            "status": "failed"
+        })
+
+# Tool name -> handler; adding a tool means adding its Tool to _TOOLS and its handler here
+_HANDLERS: Dict[str, Callable[[Any], Awaitable[list[TextContent]]]] = {
+    "hypercog_enrich": _handle_enrich
+}
 
-def handle_shutdown(signum, frame):
-    """Handle shutdown signals"""
+@app.call_tool()
+async def call_tool(name: str, arguments: Any) -> list[TextContent]:
+    """
+    Handle tool calls with input validation
+    
+    CRITICAL: Never log to stdout in STDIO MCP servers
+    All logs go to stderr through the queued logging listener
+    """
+    handler = _HANDLERS.get(name)
+    if handler is None:
+        request_logger.error("unknown_tool", extra={"tool": name})
+        return [TextContent(type="text", text=_UNKNOWN_TOOL_TEMPLATE % json_io.dumps(f"Unknown tool: {name}"))]
+    
+    return await handler(arguments)
+
+def handle_shutdown(signum: int):
+    """Handle shutdown signals; runs as an event loop callback, so setting the event is safe"""
     logger.info("shutdown_signal_received", signal=signum)
     shutdown_event.set()
 
 async def main():
     """Main entry point with graceful shutdown"""
     global orchestrator, llm_client
+    warmup_task: Optional[asyncio.Task] = None
     
-    signal.signal(signal.SIGTERM, handle_shutdown)
-    signal.signal(signal.SIGINT, handle_shutdown)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, handle_shutdown, sig)
+        except NotImplementedError:
+            # Windows event loops have no signal handler support; Ctrl+C still raises KeyboardInterrupt
+            pass
     
-    import os
     logger.info("hypercog_mcp_starting", 
                 env_file_exists=env_path.exists(),
                 env_file_path=str(env_path))
@@ -251,27 +272,56 @@ async def main():
                    required_vars_present=len(required_vars),
                    optional_vars_present=len(optional_vars) - len(missing_optional))
         
+        # Both do blocking SDK/client setup; run them side by side on worker threads
+        cognee_task = asyncio.create_task(asyncio.to_thread(setup_cognee))
         try:
-            setup_cognee()
+            llm_client = await asyncio.to_thread(LLMClient)
+        except BaseException:
+            # Retrieve the setup task's outcome so it is neither leaked nor reported as unretrieved
+            cognee_task.cancel()
+            await asyncio.gather(cognee_task, return_exceptions=True)
+            raise
+        try:
+            await cognee_task
             logger.info("cognee_initialized")
         except Exception as e:
             logger.warning("cognee_setup_failed", error=str(e))
             logger.info("continuing_without_cognee")
         
-        llm_client = LLMClient()
         orchestrator = HyperCogOrchestrator(storage_root, llm_client)
         
         logger.info("hypercog_mcp_ready")
         
         async with stdio_server() as (read_stream, write_stream):
-            await app.run(read_stream, write_stream, app.create_initialization_options())
+            # Warm connections in the background; provider timeouts must not hold up MCP initialize
+            warmup_task = asyncio.create_task(orchestrator.warmup())
+            server_task = asyncio.create_task(
+                app.run(read_stream, write_stream, app.create_initialization_options())
+            )
+            shutdown_task = asyncio.create_task(shutdown_event.wait())
+            done, pending = await asyncio.wait(
+                {server_task, shutdown_task},
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if server_task in done:
+                # Surface a server crash to the startup/failure handler below
+                server_task.result()
     
     except Exception as e:
         logger.exception("server_startup_failed", error=str(e))
         sys.exit(1)
     
     finally:
+        if warmup_task is not None:
+            warmup_task.cancel()
+            await asyncio.gather(warmup_task, return_exceptions=True)
+        if orchestrator is not None:
+            await orchestrator.aclose()
         logger.info("hypercog_mcp_shutdown_complete")
+        stop_logging()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,55 @@
+import logging
+import asyncio
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any
+
+logger = logging.getLogger("hypercog.sub_agents")
+
+class BaseSearchAgent(ABC):
+    """
+    Batch search shared by every sub-agent
+    
+    search() collapses repeated query strings, runs the distinct ones
+    side by side and fans the results back out in input order, one entry
+    per query. Subclasses set name and source and implement _one(); any
+    rate limiting belongs inside _one.
+    """
+    
+    name: str
+    source: str
+    
+    async def search(self, queries: List[str]) -> List[Dict[str, Any]]:
+        """Execute searches for all queries, recording failures per query"""
+        logger.debug("%s: Executing %d searches...", self.name, len(queries))
+        
+        unique_queries = list(dict.fromkeys(queries))
+        by_query = dict(zip(unique_queries, await asyncio.gather(*[self._search_one(query) for query in unique_queries])))
+        results = [by_query[query] for query in queries]
+        
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s: Completed %d/%d searches", self.name, sum(1 for r in results if r['success']), len(queries))
+        return results
+    
+    async def _search_one(self, query: str) -> Dict[str, Any]:
+        """Run one query, turning any failure into an error entry"""
+        try:
+            fields = await self._one(query)
+        except Exception as e:
+            logger.warning("%s: Error searching '%s': %s", self.name, query, e)
+            return {
+                "query": query,
+                "error": str(e),
+                "source": self.source,
+                "success": False
+            }
+        return {
+            "query": query,
+            **fields,
+            "source": self.source,
+            "success": True
+        }
+    
+    @abstractmethod
+    async def _one(self, query: str) -> Dict[str, Any]:
+        """Search a single query and return its result fields (at least "result")"""
+        pass
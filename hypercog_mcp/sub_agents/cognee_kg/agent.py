@@ -1,40 +1,19 @@
-import asyncio
-from typing import List, Dict, Any
+from typing import Dict, Any
 from cognee import search, SearchType
+from ..base import BaseSearchAgent
 
-class CogneeKGAgent:
+class CogneeKGAgent(BaseSearchAgent):
     """Cognee Knowledge Graph search sub-agent"""
     
+    source = "cognee_kg"
+    
     def __init__(self):
         self.name = "CogneeKGAgent"
     
-    async def search(self, queries: List[str]) -> List[Dict[str, Any]]:
-        """Execute knowledge graph searches"""
-        print(f"[{self.name}] Executing {len(queries)} KG searches...")
-        
-        results = []
-        
-        for query in queries:
-            try:
-                result = await search(
-                    query_type=SearchType.GRAPH_COMPLETION,
-                    query_text=query
-                )
-                
-                results.append({
-                    "query": query,
-                    "result": result,
-                    "source": "cognee_kg",
-                    "success": True
-                })
-            except Exception as e:
-                print(f"[{self.name}] Error searching '{query}': {e}")
-                results.append({
-                    "query": query,
-                    "error": str(e),
-                    "source": "cognee_kg",
-                    "success": False
-                })
-        
-        print(f"[{self.name}] Completed {len([r for r in results if r['success']])}/{len(queries)} searches")
-        return results
+    async def _one(self, query: str) -> Dict[str, Any]:
+        # cognee.search takes one query_text per call; BaseSearchAgent batches and dedupes around it
+        result = await search(
+            query_type=SearchType.GRAPH_COMPLETION,
+            query_text=query
+        )
+        return {"result": result}
@@ -1,14 +1,56 @@
-import os
+import re
+import time
+import asyncio
+import weakref
 import httpx
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from ...config.settings import get_settings
+from ...llm_client import RETRYABLE_STATUS_CODES, backoff_delay
+from ...utils import json_io
+from ...utils.rate_limit import AsyncTokenBucket
+from ..base import BaseSearchAgent
+
+SEARCH_SYSTEM_PROMPT = "You are a precise research assistant. Provide factual, current information with specific details."
+# Identical in every request; only the user message varies
+_SYSTEM_MESSAGE = {"role": "system", "content": SEARCH_SYSTEM_PROMPT}
+# One request plus up to two retries on 429/5xx or transport errors
+PERPLEXITY_MAX_ATTEMPTS = 3
+# Answers are reused for identical requests for this long; web results go stale, so keep it short
+RESULT_CACHE_TTL_SECONDS = 900.0
+RESULT_CACHE_ENTRIES = 512
+
+# Whole words only, so "incorrect" or "untrue" no longer count as confirmation
+_VERIFIED_RE = re.compile(r"\b(?:correct|accurate|true|yes)\b", re.IGNORECASE)
+
+# One bucket per event loop: the bucket's lock binds to the loop that first uses it
+_rate_limiters: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTokenBucket]" = weakref.WeakKeyDictionary()
+
+def _shared_rate_limiter() -> AsyncTokenBucket:
+    """
+    Pacing for Perplexity requests shared by every caller on the running loop
+    
+    The provider limits per API key, so the evaluator's validator and
+    the search sub-agent draw from the same bucket. PERPLEXITY_RPS sets
+    the rate (default 5, burst of the same size).
+    """
+    loop = asyncio.get_running_loop()
+    rate_limiter = _rate_limiters.get(loop)
+    if rate_limiter is None:
+        rate = get_settings().perplexity_rps
+        rate_limiter = _rate_limiters[loop] = AsyncTokenBucket(rate, burst=max(1, int(rate)))
+    return rate_limiter
 
 class PerplexityAgent:
     """
     Perplexity API integration for real-time web research and validation.
     """
     
-    def __init__(self):
-        self.api_key = os.getenv("PERPLEXITY_API_KEY")
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None, api_key: Optional[str] = None):
+        if api_key is None:
+            configured = get_settings().perplexity_api_key
+            api_key = configured.get_secret_value() if configured else None
+        self.api_key = api_key
         if not self.api_key:
             import warnings
             warnings.warn(
@@ -22,6 +64,21 @@ class PerplexityAgent:
         self.base_url = "https://api.perplexity.ai"
         self.model = "llama-3.1-sonar-large-128k-online"
         self.name = "PerplexityAgent"
+        self._headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        # (normalized query, max_tokens, temperature, return_citations) -> (stored at, result), oldest first
+        self._result_cache: "OrderedDict[Tuple[str, int, float, bool], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Pooled for the agent's lifetime (or shared by the caller) so searches reuse TLS connections
+        self._owns_client = http_client is None
+        self._client = http_client or httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60.0)
+        )
     
     async def search(
         self,
@@ -50,43 +107,78 @@ class PerplexityAgent:
                 "model": "disabled"
             }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model,
-                    "messages": [
-                        {
-                            "role": "system",
-                            "content": "You are a precise research assistant. Provide factual, current information with specific details."
-                        },
-                        {
-                            "role": "user",
-                            "content": query
-                        }
-                    ],
-                    "max_tokens": max_tokens,
-                    "temperature": temperature,
-                    "return_citations": return_citations,
-                    "return_related_questions": False
-                }
-            )
-            
-            response.raise_for_status()
-            data = response.json()
-            
-            answer = data["choices"][0]["message"]["content"]
-            citations = data.get("citations", [])
+        # Case and whitespace differences ask the same question, so they share an answer
+        cache_key = (" ".join(query.lower().split()), max_tokens, round(temperature, 2), return_citations)
+        entry = self._result_cache.get(cache_key)
+        if entry is not None and time.monotonic() - entry[0] < RESULT_CACHE_TTL_SECONDS:
+            self._result_cache.move_to_end(cache_key)
+            self.cache_hits += 1
+            return entry[1]
+        self.cache_misses += 1
+        
+        # Encoded with json_io (orjson when installed) rather than httpx's stdlib json= path
+        body = json_io.dumps_bytes({
+            "model": self.model,
+            "messages": [_SYSTEM_MESSAGE, {"role": "user", "content": query}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "return_citations": return_citations,
+            "return_related_questions": False
+        })
+        response = await self._post(body)
+        response.raise_for_status()
+        data = json_io.loads(response.content)
+        
+        answer = data["choices"][0]["message"]["content"]
+        citations = data.get("citations", [])
+        
+        result = {
+            "answer": answer,
+            "citations": citations,
+            "model": self.model
+        }
+        self._result_cache[cache_key] = (time.monotonic(), result)
+        self._result_cache.move_to_end(cache_key)
+        if len(self._result_cache) > RESULT_CACHE_ENTRIES:
+            self._result_cache.popitem(last=False)
+        return result
+    
+    def cache_stats(self) -> Dict[str, int]:
+        """Result cache hit/miss counters for logging"""
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "entries": len(self._result_cache)}
+    
+    async def _post(self, body: bytes) -> httpx.Response:
+        """
+        POST a chat completion, paced by the shared rate limiter
+        
+        Retryable statuses and transport errors are retried with
+        full-jitter backoff (honouring Retry-After) until
+        PERPLEXITY_MAX_ATTEMPTS is reached; the last response is returned.
+        """
+        rate_limiter = _shared_rate_limiter()
+        for attempt in range(PERPLEXITY_MAX_ATTEMPTS):
+            last_attempt = attempt == PERPLEXITY_MAX_ATTEMPTS - 1
+            await rate_limiter.acquire()
+            try:
+                response = await self._client.post(
+                    f"{self.base_url}/chat/completions",
+                    headers=self._headers,
+                    content=body
+                )
+            except httpx.TransportError:
+                if last_attempt:
+                    raise
+                await asyncio.sleep(backoff_delay(attempt))
+                continue
             
-            return {
-                "answer": answer,
-                "citations": citations,
-                "model": self.model
-            }
+            if response.status_code not in RETRYABLE_STATUS_CODES or last_attempt:
+                return response
+            await asyncio.sleep(backoff_delay(attempt, response.headers.get("Retry-After")))
+    
+    async def aclose(self):
+        """Close the HTTP client if this agent created it"""
+        if self._owns_client:
+            await self._client.aclose()
     
     async def validate_claim(
         self,
@@ -110,9 +202,8 @@ class PerplexityAgent:
         
         result = await self.search(query, max_tokens=500, temperature=0.1)
         
-        # Simple verdict extraction
-        answer = result["answer"].lower()
-        verdict = "verified" if any(word in answer for word in ["correct", "accurate", "true", "yes"]) else "uncertain"
+        # Simple verdict extraction: one case-insensitive scan, no lowered copy of the answer
+        verdict = "verified" if _VERIFIED_RE.search(result["answer"]) else "uncertain"
         
         return {
             "claim": claim,
@@ -122,15 +213,17 @@ class PerplexityAgent:
         }
 
 
-class PerplexitySearchAgent(PerplexityAgent):
+class PerplexitySearchAgent(PerplexityAgent, BaseSearchAgent):
     """
     Legacy class name for backward compatibility.
     """
     
-    def __init__(self, api_key: str = None):
-        super().__init__()
-        if api_key:
-            self.api_key = api_key
+    source = "perplexity"
+    
+    def __init__(self, api_key: str = None, http_client: Optional[httpx.AsyncClient] = None):
+        super().__init__(http_client, api_key)
+        # Shared by every search on this agent so overlapping calls stay under the provider's rate limit
+        self._sem = asyncio.Semaphore(get_settings().perplexity_concurrency)
     
     async def search(self, queries: List[str]) -> List[Dict[str, Any]]:
         """
@@ -142,28 +235,13 @@ class PerplexitySearchAgent(PerplexityAgent):
         if isinstance(queries, str):
             queries = [queries]
         
-        print(f"[{self.name}] Executing {len(queries)} searches...")
-        
-        results = []
-        
-        for query in queries:
-            try:
-                result = await super().search(query)
-                results.append({
-                    "query": query,
-                    "result": result["answer"],
-                    "citations": result.get("citations", []),
-                    "source": "perplexity",
-                    "success": True
-                })
-            except Exception as e:
-                print(f"[{self.name}] Error searching '{query}': {e}")
-                results.append({
-                    "query": query,
-                    "error": str(e),
-                    "source": "perplexity",
-                    "success": False
-                })
-        
-        print(f"[{self.name}] Completed {len([r for r in results if r['success']])}/{len(queries)} searches")
-        return results
+        return await BaseSearchAgent.search(self, queries)
+    
+    async def _one(self, query: str) -> Dict[str, Any]:
+        # Perplexity has no multi-query endpoint, so queries run side by side over the pooled client
+        async with self._sem:
+            result = await PerplexityAgent.search(self, query)
+        return {
+            "result": result["answer"],
+            "citations": result.get("citations", [])
+        }
@@ -0,0 +1,131 @@
+import os
+import re
+import json
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import json_repair
+except ImportError:
+    json_repair = None
+
+WRITE_BUFFER_SIZE = 256 * 1024
+
+# orjson.JSONDecodeError subclasses this, so callers can catch one type for both backends
+JSONDecodeError = json.JSONDecodeError
+
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+def loads(data: Any) -> Any:
+    """Parse JSON from str or bytes, using orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def loads_lenient(text: str) -> Dict[str, Any]:
+    """
+    Parse LLM output as a JSON object, repairing common defects before giving up
+
+    Tries a strict parse first. On failure (or a non-object result) strips
+    markdown code fences, trims prose around the outermost object and
+    drops trailing commas, then hands the text to json_repair when it is
+    installed. Raises JSONDecodeError if no pass yields a JSON object;
+    arrays and scalars are rejected because every caller reads keys.
+    """
+    try:
+        result = loads(text)
+        if isinstance(result, dict):
+            return result
+        error = JSONDecodeError("Expected a JSON object", text, 0)
+    except JSONDecodeError as e:
+        error = e
+    
+    candidate = _CODE_FENCE_RE.sub("", text)
+    start, end = candidate.find("{"), candidate.rfind("}")
+    if start != -1 and end > start:
+        candidate = candidate[start:end + 1]
+    candidate = _TRAILING_COMMA_RE.sub(r"\1", candidate)
+    
+    try:
+        result = loads(candidate)
+        if isinstance(result, dict):
+            return result
+    except JSONDecodeError:
+        pass
+    
+    if json_repair is not None:
+        repaired = json_repair.loads(candidate)
+        if isinstance(repaired, dict) and repaired:
+            return repaired
+    
+    raise error
+
+def dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """Serialize obj to a JSON string, optionally pretty-printed with 2-space indent and/or sorted keys"""
+    if orjson is not None:
+        return dumps_bytes(obj, indent, sort_keys).decode("utf-8")
+    if indent:
+        return json.dumps(obj, indent=2, sort_keys=sort_keys)
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys)
+
+def dumps_bytes(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON bytes, skipping the str round-trip when orjson is installed"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, option=option)
+    return dumps(obj, indent, sort_keys).encode("utf-8")
+
+def _sibling_temp(path: Path) -> Tuple[int, Path]:
+    """Create a uniquely named temp file next to path, so concurrent writers never share one"""
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    return fd, Path(tmp_name)
+
+def write_bytes_atomic(path: Path, data: bytes):
+    """Write already-encoded data to path via a sibling temp file and os.replace"""
+    fd, tmp_path = _sibling_temp(path)
+    try:
+        with open(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+def write_json(path: Path, obj: Any, indent: bool = False):
+    """
+    Serialize obj into path atomically
+
+    The document is written to a sibling temp file and moved into place
+    with os.replace, so readers never see a half-written file even if the
+    process dies mid-write. Compact separators are used unless indent is
+    set, since most of these files are machine-read storage artifacts.
+    With orjson the document is encoded to bytes in one C call and
+    written with a single write; the stdlib fallback streams through a
+    256 KiB buffer instead.
+    """
+    if orjson is not None:
+        write_bytes_atomic(path, dumps_bytes(obj, indent))
+        return
+
+    fd, tmp_path = _sibling_temp(path)
+    try:
+        with open(fd, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            if indent:
+                json.dump(obj, f, indent=2)
+            else:
+                json.dump(obj, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
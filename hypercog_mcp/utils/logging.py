@@ -1,16 +1,61 @@
 import sys
+import queue
 import logging
-import structlog
+import logging.handlers
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+from . import json_io
+
+LOG_QUEUE_SIZE = 10000
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Attributes every LogRecord carries; anything else on a record came from extra=
+_RECORD_ATTRS = frozenset(logging.LogRecord("", 0, "", 0, "", None, None).__dict__) | {"message", "asctime", "taskName"}
+
+class JsonFormatter(logging.Formatter):
+    """
+    Render a record as one JSON object per line
+    
+    The message becomes "event", alongside an ISO UTC timestamp, the
+    level and the logger name; fields passed via extra= are added as
+    top-level keys, and exception tracebacks as "exception".
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        entry.update((key, value) for key, value in record.__dict__.items() if key not in _RECORD_ATTRS)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        try:
+            return json_io.dumps(entry)
+        except TypeError:
+            # Arbitrary objects in extra= (e.g. exceptions inside validation errors) fall back to str()
+            return json_io.dumps({key: value if isinstance(value, (str, int, float, bool, type(None))) else str(value) for key, value in entry.items()})
 
 def setup_logging(log_level: str = "INFO", log_file: Path = None):
     """
     Configure structured logging for HyperCog
-    
+
     CRITICAL: Never write to stdout in STDIO MCP servers
     All logs go to stderr or file
+
+    Records are handed to a QueueHandler and written by a QueueListener
+    thread, so stderr and file writes never block the event loop. Call
+    stop_logging() on shutdown to flush the queue.
     """
+    global _listener
+    # Deferred so importing this module (e.g. for stop_logging) stays cheap
+    import structlog
     
+    level = logging.getLevelName(log_level)
+
     structlog.configure(
         processors=[
             structlog.contextvars.merge_contextvars,
@@ -18,15 +63,58 @@ def setup_logging(log_level: str = "INFO", log_file: Path = None):
             structlog.processors.TimeStamper(fmt="iso"),
             structlog.dev.ConsoleRenderer()
         ],
-        wrapper_class=structlog.make_filtering_bound_logger(logging.getLevelName(log_level)),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         context_class=dict,
-        logger_factory=structlog.PrintLoggerFactory(file=sys.stderr),
+        logger_factory=structlog.stdlib.LoggerFactory(),
         cache_logger_on_first_use=True,
     )
-    
-    if log_file:
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(logging.getLevelName(log_level))
-        logging.root.addHandler(file_handler)
-    
-    return structlog.get_logger()
+
+    if _listener is None:
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+
+        stderr_handler = logging.StreamHandler(sys.stderr)
+        handlers = [stderr_handler]
+        if log_file:
+            # delay=True: the file is opened by the listener thread on its first record
+            file_handler = logging.FileHandler(log_file, delay=True)
+            file_handler.setLevel(level)
+            handlers.append(file_handler)
+
+        # structlog renders its own lines; loggers resolve to hypercog_mcp.*
+        structlog_logger = logging.getLogger("hypercog_mcp")
+        structlog_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        structlog_logger.propagate = False
+
+        # Agents log through stdlib logging under the "hypercog" namespace
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+        hypercog_logger = logging.getLogger("hypercog")
+        hypercog_logger.addHandler(queue_handler)
+        hypercog_logger.propagate = False
+
+        # Per-request server lines are machine-read; emit them as JSON
+        server_handler = logging.handlers.QueueHandler(log_queue)
+        server_handler.setFormatter(JsonFormatter())
+        server_logger = logging.getLogger("hypercog.server")
+        server_logger.addHandler(server_handler)
+        server_logger.propagate = False
+
+        # Third-party warnings reach root; queue them too instead of the synchronous last-resort handler
+        root_handler = logging.handlers.QueueHandler(log_queue)
+        root_handler.setFormatter(logging.Formatter("[%(levelname)s] %(name)s: %(message)s"))
+        logging.root.addHandler(root_handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+    logging.getLogger("hypercog_mcp").setLevel(level)
+    logging.getLogger("hypercog").setLevel(level)
+
+    return structlog.get_logger("hypercog_mcp")
+
+def stop_logging():
+    """Flush queued records and stop the background listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,30 @@
+import time
+import asyncio
+
+class AsyncTokenBucket:
+    """
+    Pace async callers to a steady request rate
+    
+    The bucket holds up to burst tokens and refills at rate_per_sec.
+    acquire() takes one token, sleeping until one is available; waiters
+    are served in arrival order because the lock is held while sleeping.
+    """
+    
+    def __init__(self, rate_per_sec: float, burst: int = 1):
+        self.rate = rate_per_sec
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait for and consume one token"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
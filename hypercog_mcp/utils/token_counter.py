@@ -1,25 +1,122 @@
-import tiktoken
-from typing import Optional
+import os
+import functools
+from collections import OrderedDict
+from pathlib import Path
+from typing import TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:
+    import tiktoken
+
+# tiktoken downloads BPE files on first use and by default caches them under the system temp
+# dir, which is routinely wiped; used unless TIKTOKEN_CACHE_DIR (or DATA_GYM_CACHE_DIR) is set
+DEFAULT_TIKTOKEN_CACHE_DIR = Path.home() / ".cache" / "hypercog" / "tiktoken"
+
+# Distinct texts whose counts each TokenCounter remembers
+COUNT_CACHE_ENTRIES = 4096
+# ASCII texts shorter than this are estimated at ~4 chars/token by approx_count_tokens
+APPROX_SHORT_TEXT_CHARS = 32
+# Characters of input kept per requested token before truncating (typical English is ~4)
+TRUNCATE_PREFIX_CHARS_PER_TOKEN = 8
+
+@functools.lru_cache(maxsize=None)
+def _ensure_tiktoken_cache_dir():
+    """Point tiktoken at a durable cache dir, once, before the first encoding is loaded"""
+    # An explicit choice wins, including an empty value (which disables tiktoken's cache)
+    if "TIKTOKEN_CACHE_DIR" in os.environ or "DATA_GYM_CACHE_DIR" in os.environ:
+        return
+    DEFAULT_TIKTOKEN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ["TIKTOKEN_CACHE_DIR"] = str(DEFAULT_TIKTOKEN_CACHE_DIR)
+
+@functools.lru_cache(maxsize=32)
+def _encoding_for(model: str) -> "tiktoken.Encoding":
+    """
+    Build each model's encoding once per process; construction loads the BPE ranks
+
+    Every TokenCounter for the same model shares the returned Encoding.
+    Unknown model names fall back to cl100k_base, and the cache is
+    bounded so arbitrary model strings cannot grow it without limit.
+    """
+    # Imported here so loading this module does not pull in the native BPE core
+    import tiktoken
+    
+    _ensure_tiktoken_cache_dir()
+    
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
 
 class TokenCounter:
     """Accurate token counting using tiktoken"""
     
     def __init__(self, model: str = "gpt-4"):
         self.model = model
-        try:
-            self.encoding = tiktoken.encoding_for_model(model)
-        except KeyError:
-            self.encoding = tiktoken.get_encoding("cl100k_base")
+        self.encoding = _encoding_for(model)
+        # hash(text) -> token count, least recently used first
+        self._cache: "OrderedDict[int, int]" = OrderedDict()
     
     def count_tokens(self, text: str) -> int:
-        """Count tokens in text"""
+        """Count tokens in text, reusing the count for text seen recently"""
         if not text:
             return 0
-        return len(self.encoding.encode(text))
+        # str caches its own hash, so repeat lookups for the same object cost nothing
+        key = hash(text)
+        count = self._cache.get(key)
+        if count is not None:
+            self._cache.move_to_end(key)
+            return count
+        
+        # Special-token markers in user text are counted as plain text instead of raising
+        count = len(self.encoding.encode_ordinary(text))
+        self._cache[key] = count
+        if len(self._cache) > COUNT_CACHE_ENTRIES:
+            self._cache.popitem(last=False)
+        return count
+    
+    def approx_count_tokens(self, text: str) -> int:
+        """
+        Cheap token estimate for budget checks where a token either way is irrelevant
+        
+        Short ASCII text (under APPROX_SHORT_TEXT_CHARS) is estimated at
+        four characters per token without touching BPE; anything longer or
+        non-ASCII goes through the exact count_tokens.
+        """
+        if len(text) < APPROX_SHORT_TEXT_CHARS and text.isascii():
+            return max(1, len(text) // 4) if text else 0
+        return self.count_tokens(text)
+    
+    def fit(self, text: str, max_tokens: int) -> Tuple[str, int]:
+        """
+        Truncate text to max_tokens and return it with its token count
+        
+        Encodes once instead of counting and then truncating. Text that
+        fits comes back unchanged with its exact count (which also seeds
+        the count_tokens cache); longer text is cut to its first max_tokens
+        tokens and reported as max_tokens.
+        """
+        # Only the head survives; encoding a bounded prefix keeps huge inputs cheap.
+        # Dense text (whitespace runs, code) packs many chars per token, so a prefix
+        # still within the limit is widened until it overflows or covers the whole text
+        limit = max(max_tokens, 1) * TRUNCATE_PREFIX_CHARS_PER_TOKEN
+        while True:
+            tokens = self.encoding.encode_ordinary(text[:limit])
+            if len(tokens) > max_tokens:
+                return self.encoding.decode(tokens[:max_tokens]), max_tokens
+            if limit >= len(text):
+                break
+            limit *= 2
+        
+        count = len(tokens)
+        if text:
+            self._cache[hash(text)] = count
+            if len(self._cache) > COUNT_CACHE_ENTRIES:
+                self._cache.popitem(last=False)
+        return text, count
     
     def truncate_to_tokens(self, text: str, max_tokens: int) -> str:
         """Truncate text to fit within token limit"""
-        tokens = self.encoding.encode(text)
-        if len(tokens) <= max_tokens:
+        # Every token covers at least one UTF-8 byte, so text with no more bytes than the
+        # limit fits without encoding (ASCII is one byte per char, anything else at most four)
+        if (len(text) if text.isascii() else 4 * len(text)) <= max_tokens:
             return text
-        return self.encoding.decode(tokens[:max_tokens])
+        return self.fit(text, max_tokens)[0]
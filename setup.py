@@ -12,11 +12,16 @@ setup(
         "python-dotenv>=1.0.0",
         "openai>=1.0.0",
         "google-generativeai>=0.3.0",
-        "httpx>=0.25.0",
+        "httpx[http2]>=0.25.0",
         "aiofiles>=23.0.0",
         "pydantic>=2.0.0",
+        "pydantic-settings>=2.0.0",
     ],
-    python_requires=">=3.10",
+    extras_require={
+        # Picked up by utils.json_io for request bodies, responses and storage files
+        "fast": ["orjson>=3.9.0"],
+    },
+    python_requires=">=3.11",
     entry_points={
         "console_scripts": [
             "hypercog=hypercog_mcp.cli:cli",
@@ -33,12 +33,12 @@ def test_env_loading():
     
     # Check required variables
     print(f"\n3. Checking REQUIRED variables...")
-    required = {
-        "OPENAI_API_KEY": "OpenAI API access"
-    }
+    required = (
+        ("OPENAI_API_KEY", "OpenAI API access"),
+    )
     
     all_present = True
-    for var, description in required.items():
+    for var, description in required:
         value = os.getenv(var)
         if value:
             masked = value[:8] + "..." if len(value) > 8 else "***"
@@ -49,13 +49,13 @@ def test_env_loading():
     
     # Check optional variables
     print(f"\n4. Checking OPTIONAL variables...")
-    optional = {
-        "PERPLEXITY_API_KEY": "Enhanced evaluator validation",
-        "GOOGLE_API_KEY": "Google services",
-    }
+    optional = (
+        ("PERPLEXITY_API_KEY", "Enhanced evaluator validation"),
+        ("GOOGLE_API_KEY", "Google services"),
+    )
     
     optional_present = []
-    for var, description in optional.items():
+    for var, description in optional:
         value = os.getenv(var)
         if value:
             masked = value[:8] + "..." if len(value) > 8 else "***"
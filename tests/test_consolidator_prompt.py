@@ -0,0 +1,31 @@
+import pytest
+
+pytest.importorskip("tiktoken")
+
+from hypercog_mcp.agents.consolidator import ConsolidatorAgent, MAX_RESULT_TOKENS
+
+
+@pytest.fixture
+def consolidator(tmp_path):
+    return ConsolidatorAgent(tmp_path / "consolidator_agent.md", llm_client=None, storage_root=tmp_path)
+
+
+def _prompt(consolidator, result_text):
+    return consolidator._build_consolidation_prompt(
+        {"task": "t", "original_context": "c"},
+        {"perplexity": [{"query": "q", "result": result_text, "success": True}]}
+    )
+
+
+def test_short_result_is_copied_verbatim(consolidator):
+    prompt = _prompt(consolidator, "short answer")
+    assert "Result: short answer\n" in prompt
+    assert "[...]" not in prompt
+
+
+def test_long_result_is_cut_to_the_token_cap(consolidator):
+    long_text = "word " * (MAX_RESULT_TOKENS * 3)
+    prompt = _prompt(consolidator, long_text)
+    kept = prompt.split("Result: ", 1)[1].split(" [...]", 1)[0]
+    assert long_text.startswith(kept)
+    assert consolidator.token_counter.count_tokens(kept) <= MAX_RESULT_TOKENS
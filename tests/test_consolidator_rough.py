@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("tiktoken")
+
+from hypercog_mcp.agents.consolidator import ConsolidatorAgent
+
+
+@pytest.fixture
+def consolidator(tmp_path):
+    return ConsolidatorAgent(tmp_path / "consolidator_agent.md", llm_client=None, storage_root=tmp_path)
+
+
+def _results(answer):
+    return {"perplexity": [{"query": "q", "result": answer, "source": "perplexity", "success": True}]}
+
+
+def _save(consolidator, sub_results):
+    unsaved, keys = consolidator._unsaved_results(sub_results)
+    asyncio.run(consolidator._save_to_rough_folder(unsaved, keys))
+    return unsaved
+
+
+def test_saved_result_is_skipped_next_time(consolidator):
+    assert _save(consolidator, _results("a"))["perplexity"]
+    assert _save(consolidator, _results("a"))["perplexity"] == []
+
+
+def test_updated_result_for_same_query_is_saved(consolidator):
+    _save(consolidator, _results("a"))
+    assert _save(consolidator, _results("b"))["perplexity"]
+
+
+def test_failed_write_is_retried(consolidator, monkeypatch):
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(ConsolidatorAgent, "_write_snapshot", fail)
+    _save(consolidator, _results("a"))
+    monkeypatch.undo()
+    assert _save(consolidator, _results("a"))["perplexity"]
@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("tiktoken")
+
+from hypercog_mcp.utils.token_counter import TokenCounter, TRUNCATE_PREFIX_CHARS_PER_TOKEN
+
+
+@pytest.fixture
+def counter():
+    return TokenCounter()
+
+
+def test_short_text_is_returned_unchanged(counter):
+    assert counter.truncate_to_tokens("hello world", 100) == "hello world"
+
+
+def test_long_text_is_cut_to_the_limit(counter):
+    text = "the quick brown fox jumps over the lazy dog " * 500
+    truncated = counter.truncate_to_tokens(text, 50)
+    assert text.startswith(truncated)
+    assert counter.count_tokens(truncated) <= 50
+
+
+@pytest.mark.parametrize("text", [
+    " " * 20000 + "end",
+    ("        if value is not None:\n            return value\n" + "\n" * 400) * 40,
+])
+def test_dense_text_that_fits_is_not_cut(counter, text):
+    # Whitespace runs and indented code pack more than TRUNCATE_PREFIX_CHARS_PER_TOKEN
+    # characters into each token, so the first encoded prefix alone fits the budget
+    max_tokens = counter.count_tokens(text)
+    assert len(text) > max_tokens * TRUNCATE_PREFIX_CHARS_PER_TOKEN
+    assert counter.truncate_to_tokens(text, max_tokens) == text
+    assert counter.count_tokens(counter.truncate_to_tokens(text, max_tokens - 1)) <= max_tokens - 1
+
+
+def test_fit_returns_text_that_fits_with_its_count(counter):
+    text = "hello world " * 100
+    assert counter.fit(text, 10_000) == (text, counter.count_tokens(text))
+
+
+def test_fit_cuts_long_text_to_the_limit(counter):
+    text = "the quick brown fox jumps over the lazy dog " * 500
+    fitted, count = counter.fit(text, 50)
+    assert count == 50
+    assert text.startswith(fitted)
+    assert counter.count_tokens(fitted) <= 50
+
+
+def test_fit_with_zero_budget_returns_empty_text(counter):
+    assert counter.fit("some text", 0) == ("", 0)